@@ -1,9 +1,13 @@
 # Gemini NVDA Add-on - Main Plugin
 # -*- coding: utf-8 -*-
 
+import itertools
 import os
 import sys
+import threading
+import time
 import wx
+from concurrent.futures import ThreadPoolExecutor
 
 import addonHandler
 import globalPluginHandler
@@ -31,38 +35,145 @@ from .consts import (
     GEMINI_MODELS,
     DEFAULT_MODEL,
     DEFAULT_SYSTEM_PROMPT,
+    MAX_VIDEO_UPLOAD_BYTES,
+    get_model_index,
 )
 from .configspec import confSpecs, get_safe_conf
 from . import apikeymanager
 from . import videocapture
 
-# Clear any conflicting modules that might be loaded from NVDA or other addons
-# This includes typing_extensions which NVDA bundles an older version of
-_modules_to_clear = [key for key in list(sys.modules.keys())
-                     if key.startswith(('google.', 'pydantic', 'pydantic_core', 'typing_extensions', 'annotated_types'))]
-for mod in _modules_to_clear:
-    del sys.modules[mod]
-# Also clear base modules if present
-for base_mod in ('google', 'typing_extensions', 'annotated_types'):
-    if base_mod in sys.modules:
-        del sys.modules[base_mod]
-
-# Add lib directory to path for google-genai (at the beginning for priority)
-if LIBS_DIR in sys.path:
-    sys.path.remove(LIBS_DIR)
-sys.path.insert(0, LIBS_DIR)
-
-# Try to import google-genai
-try:
-    from google import genai
-    GENAI_AVAILABLE = True
-    log.info(f"google-genai loaded successfully from {LIBS_DIR}")
-except Exception as e:
-    GENAI_AVAILABLE = False
-    import traceback
-    log.error(f"google-genai import failed: {e}")
-    log.error(f"Full traceback:\n{traceback.format_exc()}")
-    log.warning("google-genai not found. Bundled libraries may be missing or corrupted.")
+_MODEL_NAMES = [m.name for m in GEMINI_MODELS]
+
+# Messages used on keystroke paths, translated once at load
+# Translators: Error when the bundled Google GenAI library is missing
+_MSG_NO_GENAI = _("Google GenAI library not installed.")
+_MSG_NO_API_KEY = _(NO_API_KEY_MSG)
+# Translators: Message while capturing screenshot
+_MSG_CAPTURING_SCREEN = _("Capturing screen...")
+# Translators: Error when screenshot fails
+_MSG_SCREENSHOT_FAILED = _("Failed to capture screenshot")
+# Translators: Message while capturing object
+_MSG_CAPTURING_OBJECT = _("Capturing object...")
+# Translators: Error when object capture fails
+_MSG_OBJECT_FAILED = _("Failed to capture object")
+# Translators: Message while summarizing text
+_MSG_SUMMARIZING = _("Summarizing...")
+# Translators: Shown when the AI returns an empty response
+_MSG_NO_RESPONSE = _("No response from AI")
+
+# Translators: Default video analysis prompt sent to the AI model
+_DEFAULT_VIDEO_PROMPT = _("Describe this video in detail, but concise. Get as much information as you can and if there is any important text in the video read it.")
+# Translators: Default prompt used when summarizing selected text with AI
+_DEFAULT_SUMMARIZE_PROMPT = _("Summarize the key points of the following text in a clear and concise manner:")
+# Translators: Default prompt used when summarizing the last spoken text with AI
+_DEFAULT_SUMMARIZE_SPEECH_PROMPT = _("Summarize the following text concisely. Respond in the same language as the text:")
+
+# Bundled libraries (mss, PIL, ...) are imported from LIBS_DIR; add it once here
+# rather than on every capture. _ensure_genai moves it to the front later.
+if LIBS_DIR not in sys.path:
+    sys.path.insert(0, LIBS_DIR)
+
+# google-genai is imported on first use (see _ensure_genai) rather than at
+# plugin load, so NVDA startup doesn't pay for it when Gemini is never used.
+_genai = None
+_genai_checked = False
+GENAI_AVAILABLE = False
+
+
+# Packages bundled in LIBS_DIR that google-genai imports
+_BUNDLED_PACKAGES = ("google", "google.genai", "pydantic", "pydantic_core", "typing_extensions", "annotated_types")
+
+
+def _loaded_from_libs(module) -> bool:
+    """Check whether an imported module or package comes from LIBS_DIR."""
+    paths = getattr(module, "__path__", None) or [getattr(module, "__file__", None) or ""]
+    return any(os.path.normcase(p).startswith(os.path.normcase(LIBS_DIR)) for p in paths)
+
+
+def _ensure_genai() -> bool:
+    """Import the bundled google-genai library once and report whether it is available."""
+    global _genai, _genai_checked, GENAI_AVAILABLE
+    if _genai_checked:
+        return GENAI_AVAILABLE
+    _genai_checked = True
+
+    # Add lib directory to path for google-genai (at the beginning for priority)
+    if LIBS_DIR in sys.path:
+        sys.path.remove(LIBS_DIR)
+    sys.path.insert(0, LIBS_DIR)
+
+    # Drop copies of the bundled packages that NVDA or other add-ons already
+    # loaded from elsewhere (NVDA ships an older typing_extensions). Packages
+    # that already resolve to LIBS_DIR, including the "google" namespace once
+    # LIBS_DIR is on sys.path, are left alone, so usually nothing is scanned.
+    stale = tuple(
+        name for name in _BUNDLED_PACKAGES
+        if name in sys.modules and not _loaded_from_libs(sys.modules[name])
+    )
+    if stale:
+        prefixes = tuple(name + "." for name in stale)
+        for mod in [key for key in sys.modules if key in stale or key.startswith(prefixes)]:
+            del sys.modules[mod]
+
+    try:
+        from google import genai
+        _genai = genai
+        GENAI_AVAILABLE = True
+        log.info(f"google-genai loaded successfully from {LIBS_DIR}")
+    except Exception as e:
+        GENAI_AVAILABLE = False
+        import traceback
+        log.error(f"google-genai import failed: {e}")
+        log.error(f"Full traceback:\n{traceback.format_exc()}")
+        log.warning("google-genai not found. Bundled libraries may be missing or corrupted.")
+    return GENAI_AVAILABLE
+
+
+# Longest wait, in seconds, for an uploaded video to leave the PROCESSING state
+_VIDEO_PROCESSING_TIMEOUT = 600
+
+_maindialog = None
+
+
+def _get_maindialog():
+    """Import the dialog module on first use and keep it bound here."""
+    global _maindialog
+    if _maindialog is None:
+        from . import maindialog
+        _maindialog = maindialog
+    return _maindialog
+
+
+def _shot_to_image(shot, size: tuple[int, int] | None = None):
+    """Convert an mss screenshot to an RGB PIL image, optionally resized.
+
+    The BGRA buffer is wrapped without copying and the channels are swapped
+    after resizing, so only the output-sized image is ever converted.
+    """
+    from PIL import Image
+
+    pil_img = Image.frombuffer("RGBX", shot.size, shot.raw, "raw", "RGBX", 0, 1)
+    if size is not None:
+        pil_img = pil_img.resize(size, Image.Resampling.BILINEAR)
+    b, g, r = pil_img.split()[:3]
+    return Image.merge("RGB", (r, g, b))
+
+
+def _save_shot(shot, path: str, size: tuple[int, int] | None = None):
+    """Write an mss screenshot to a PNG file, resizing it first if requested.
+
+    Without a resize PIL is not needed at all; mss encodes the PNG itself.
+    """
+    if size is None:
+        import mss.tools
+        mss.tools.to_png(shot.rgb, shot.size, output=path)
+        return
+    # Default zlib level; optimize=True is several times slower to encode
+    _shot_to_image(shot, size).save(path, "PNG")
+
+
+# Placeholder shown in the key field when a key is already stored
+_MASKED_SENTINEL = "*" * 20
 
 
 class APIKeyDialog(wx.Dialog):
@@ -103,10 +214,12 @@ class APIKeyDialog(wx.Dialog):
         key_sizer.Add(key_label, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 5)
 
         self._key_text = wx.TextCtrl(panel, style=wx.TE_PASSWORD, size=(400, -1))
-        current_key = self._key_manager.get_api_key() or ""
-        if current_key:
-            # Show masked key
-            self._key_text.SetValue("*" * 20)
+        # True while the field still holds the untouched placeholder
+        self._masked = bool(self._key_manager.get_api_key())
+        if self._masked:
+            # Show masked key; ChangeValue doesn't fire EVT_TEXT
+            self._key_text.ChangeValue(_MASKED_SENTINEL)
+        self._key_text.Bind(wx.EVT_TEXT, self._on_key_edited)
         key_sizer.Add(self._key_text, 1, wx.EXPAND)
 
         sizer.Add(key_sizer, 0, wx.EXPAND | wx.ALL, 10)
@@ -134,10 +247,14 @@ class APIKeyDialog(wx.Dialog):
 
         btn_ok.Bind(wx.EVT_BUTTON, self._on_ok)
 
+    def _on_key_edited(self, event):
+        self._masked = False
+        event.Skip()
+
     def _on_ok(self, event):
         key = self._key_text.GetValue().strip()
         # Don't save if it's the masked placeholder
-        if key and not key.startswith("*" * 10):
+        if key and not self._masked:
             if self._key_manager.save_api_key(key):
                 # Translators: Confirmation that API key was saved
                 ui.message(_("API key saved"))
@@ -173,18 +290,13 @@ class GeminiSettingsPanel(SettingsPanel):
         self._api_key_btn.Bind(wx.EVT_BUTTON, self._on_configure_api_key)
 
         # Model selection
-        model_choices = [m.name for m in GEMINI_MODELS]
         # Translators: Label for default model selection
         self._model_choice = sHelper.addLabeledControl(
             _("Default &model:"),
             wx.Choice,
-            choices=model_choices,
+            choices=_MODEL_NAMES,
         )
-        current_model = get_safe_conf()["model"]
-        for i, m in enumerate(GEMINI_MODELS):
-            if m.id == current_model:
-                self._model_choice.SetSelection(i)
-                break
+        self._model_choice.SetSelection(get_model_index(get_safe_conf()["model"]))
 
         # Temperature
         # Translators: Label for temperature setting
@@ -248,8 +360,7 @@ class GeminiSettingsPanel(SettingsPanel):
         self._video_prompt_text = sHelper.addItem(
             wx.TextCtrl(self, style=wx.TE_MULTILINE, size=(-1, 75))
         )
-        # Translators: Default video analysis prompt sent to the AI model
-        self._default_video_prompt = _("Describe this video in detail, but concise. Get as much information as you can and if there is any important text in the video read it.")
+        self._default_video_prompt = _DEFAULT_VIDEO_PROMPT
         saved_prompt = get_safe_conf()["videoPrompt"]
         self._video_prompt_text.SetValue(saved_prompt if saved_prompt else self._default_video_prompt)
 
@@ -260,8 +371,7 @@ class GeminiSettingsPanel(SettingsPanel):
         self._summarize_prompt_text = sHelper.addItem(
             wx.TextCtrl(self, style=wx.TE_MULTILINE, size=(-1, 75))
         )
-        # Translators: Default prompt used when summarizing selected text with AI
-        self._default_summarize_prompt = _("Summarize the key points of the following text in a clear and concise manner:")
+        self._default_summarize_prompt = _DEFAULT_SUMMARIZE_PROMPT
         saved_summarize_prompt = get_safe_conf()["summarizePrompt"]
         self._summarize_prompt_text.SetValue(saved_summarize_prompt if saved_summarize_prompt else self._default_summarize_prompt)
 
@@ -272,8 +382,7 @@ class GeminiSettingsPanel(SettingsPanel):
         self._summarize_speech_prompt_text = sHelper.addItem(
             wx.TextCtrl(self, style=wx.TE_MULTILINE, size=(-1, 75))
         )
-        # Translators: Default prompt used when summarizing the last spoken text with AI
-        self._default_summarize_speech_prompt = _("Summarize the following text concisely. Respond in the same language as the text:")
+        self._default_summarize_speech_prompt = _DEFAULT_SUMMARIZE_SPEECH_PROMPT
         saved_summarize_speech_prompt = get_safe_conf()["summarizeSpeechPrompt"]
         self._summarize_speech_prompt_text.SetValue(saved_summarize_speech_prompt if saved_summarize_speech_prompt else self._default_summarize_speech_prompt)
 
@@ -318,51 +427,48 @@ class GeminiSettingsPanel(SettingsPanel):
         dlg.Destroy()
 
     def onSave(self):
+        cfg = get_safe_conf()
+        fb = cfg["feedback"]
+
         # Model
         model_idx = self._model_choice.GetSelection()
         if model_idx >= 0:
-            get_safe_conf()["model"] = GEMINI_MODELS[model_idx].id
+            cfg["model"] = GEMINI_MODELS[model_idx].id
 
         # Parameters
-        get_safe_conf()["temperature"] = self._temp_spinner.GetValue() / 100.0
-        get_safe_conf()["maxOutputTokens"] = self._max_tokens_spinner.GetValue()
-        get_safe_conf()["stream"] = self._stream_checkbox.GetValue()
-        get_safe_conf()["conversationMode"] = self._convo_checkbox.GetValue()
-        get_safe_conf()["saveSystemPrompt"] = self._save_prompt_checkbox.GetValue()
-        get_safe_conf()["blockEscapeKey"] = self._block_escape_checkbox.GetValue()
-        get_safe_conf()["filterMarkdown"] = self._filter_markdown_checkbox.GetValue()
+        cfg["temperature"] = self._temp_spinner.GetValue() / 100.0
+        cfg["maxOutputTokens"] = self._max_tokens_spinner.GetValue()
+        cfg["stream"] = self._stream_checkbox.GetValue()
+        cfg["conversationMode"] = self._convo_checkbox.GetValue()
+        cfg["saveSystemPrompt"] = self._save_prompt_checkbox.GetValue()
+        cfg["blockEscapeKey"] = self._block_escape_checkbox.GetValue()
+        cfg["filterMarkdown"] = self._filter_markdown_checkbox.GetValue()
 
         # Video prompt - store empty string if user left the localized default unchanged
         video_prompt_val = self._video_prompt_text.GetValue().strip()
         if video_prompt_val == self._default_video_prompt:
-            get_safe_conf()["videoPrompt"] = ""
+            cfg["videoPrompt"] = ""
         else:
-            get_safe_conf()["videoPrompt"] = video_prompt_val
+            cfg["videoPrompt"] = video_prompt_val
 
         # Summarize prompt - store empty string if user left the localized default unchanged
         summarize_prompt_val = self._summarize_prompt_text.GetValue().strip()
         if summarize_prompt_val == self._default_summarize_prompt:
-            get_safe_conf()["summarizePrompt"] = ""
+            cfg["summarizePrompt"] = ""
         else:
-            get_safe_conf()["summarizePrompt"] = summarize_prompt_val
+            cfg["summarizePrompt"] = summarize_prompt_val
 
         # Summarize speech prompt - store empty string if user left the localized default unchanged
         summarize_speech_prompt_val = self._summarize_speech_prompt_text.GetValue().strip()
         if summarize_speech_prompt_val == self._default_summarize_speech_prompt:
-            get_safe_conf()["summarizeSpeechPrompt"] = ""
+            cfg["summarizeSpeechPrompt"] = ""
         else:
-            get_safe_conf()["summarizeSpeechPrompt"] = summarize_speech_prompt_val
+            cfg["summarizeSpeechPrompt"] = summarize_speech_prompt_val
 
         # Feedback
-        get_safe_conf()["feedback"]["soundRequestSent"] = (
-            self._snd_sent_checkbox.GetValue()
-        )
-        get_safe_conf()["feedback"]["soundResponsePending"] = (
-            self._snd_pending_checkbox.GetValue()
-        )
-        get_safe_conf()["feedback"]["soundResponseReceived"] = (
-            self._snd_received_checkbox.GetValue()
-        )
+        fb["soundRequestSent"] = self._snd_sent_checkbox.GetValue()
+        fb["soundResponsePending"] = self._snd_pending_checkbox.GetValue()
+        fb["soundResponseReceived"] = self._snd_received_checkbox.GetValue()
 
 
 class GlobalPlugin(globalPluginHandler.GlobalPlugin):
@@ -389,6 +495,11 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
         # Video capture instance
         self._video_capture = None
 
+        # Worker for screenshot/object captures (lazy loaded)
+        self._capture_executor = None
+        self._capture_local = threading.local()
+        self._capture_seq = itertools.count()
+
         # Speech history capture
         self._last_speech = None
         self._patch_speech()
@@ -431,22 +542,22 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 
     def _cleanup_temp_files(self):
         """Clean up old screenshot and video files on startup."""
-        import glob
-
-        patterns = [
-            os.path.join(DATA_DIR, "screenshot_*.png"),
-            os.path.join(DATA_DIR, "object_*.png"),
-            os.path.join(DATA_DIR, "capture_*.mp4"),
-        ]
-
         deleted_count = 0
-        for pattern in patterns:
-            for filepath in glob.glob(pattern):
-                try:
-                    os.remove(filepath)
-                    deleted_count += 1
-                except Exception as e:
-                    log.warning(f"Failed to delete temp file {filepath}: {e}")
+        try:
+            with os.scandir(DATA_DIR) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if (
+                        (name.startswith(("screenshot_", "object_")) and name.endswith(".png"))
+                        or (name.startswith("capture_") and name.endswith(".mp4"))
+                    ):
+                        try:
+                            os.remove(entry.path)
+                            deleted_count += 1
+                        except OSError as e:
+                            log.warning(f"Failed to delete temp file {entry.path}: {e}")
+        except OSError as e:
+            log.warning(f"Failed to scan {DATA_DIR} for temp files: {e}")
 
         if deleted_count > 0:
             log.info(f"Cleaned up {deleted_count} temporary files from previous session")
@@ -456,9 +567,14 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
         # Restore original speech function
         self._unpatch_speech()
 
-        # Stop video capture if running
-        if self._video_capture and self._video_capture.is_recording:
-            self._video_capture.stop()
+        # Stop video capture if running and release its worker
+        if self._video_capture:
+            self._video_capture.close()
+
+        # Stop the capture worker, releasing its mss instance first
+        if self._capture_executor:
+            self._capture_executor.submit(self._close_mss)
+            self._capture_executor.shutdown(wait=False)
 
         # Remove settings panel
         try:
@@ -468,6 +584,7 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 
         # Remove menu
         try:
+            gui.mainFrame.sysTrayIcon.Unbind(wx.EVT_MENU, handler=self._on_menu)
             gui.mainFrame.sysTrayIcon.menu.Remove(self._menu_item)
         except Exception:
             pass
@@ -480,21 +597,22 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 
         # Translators: Menu item to open Gemini dialog
         dialog_item = self._menu.Append(wx.ID_ANY, _("Open Gemini &Dialog...\tNVDA+G"))
-        gui.mainFrame.sysTrayIcon.Bind(
-            wx.EVT_MENU, self._on_show_dialog, dialog_item
-        )
 
         self._menu.AppendSeparator()
 
         # Translators: Menu item to open settings
         settings_item = self._menu.Append(wx.ID_ANY, _("&Settings..."))
-        gui.mainFrame.sysTrayIcon.Bind(
-            wx.EVT_MENU, self._on_show_settings, settings_item
-        )
 
         # Translators: Menu item to open API key page
         api_item = self._menu.Append(wx.ID_ANY, _("Get &API Key (web)..."))
-        gui.mainFrame.sysTrayIcon.Bind(wx.EVT_MENU, self._on_open_api_page, api_item)
+
+        # One handler for the whole menu, dispatching on the item id
+        self._menu_handlers = {
+            dialog_item.GetId(): self._on_show_dialog,
+            settings_item.GetId(): self._on_show_settings,
+            api_item.GetId(): self._on_open_api_page,
+        }
+        gui.mainFrame.sysTrayIcon.Bind(wx.EVT_MENU, self._on_menu)
 
         # Add to system tray
         # Translators: System tray menu item label
@@ -502,6 +620,14 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
             2, wx.ID_ANY, _("&Gemini"), self._menu
         )
 
+    def _on_menu(self, event):
+        """Route tray menu events for our items; let NVDA handle the rest."""
+        handler = self._menu_handlers.get(event.GetId())
+        if handler:
+            handler(event)
+        else:
+            event.Skip()
+
     def _on_show_dialog(self, event):
         """Open the main Gemini dialog."""
         self._show_dialog()
@@ -521,7 +647,7 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 
     def _get_client(self):
         """Get or create Gemini client."""
-        if not GENAI_AVAILABLE:
+        if not _ensure_genai():
             return None
 
         api_key = self._key_manager.get_api_key()
@@ -530,16 +656,28 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 
         if self._client is None:
             try:
-                self._client = genai.Client(api_key=api_key)
+                self._client = _genai.Client(api_key=api_key)
             except Exception as e:
                 log.error(f"Failed to create Gemini client: {e}")
                 return None
 
         return self._client
 
+    def _ensure_client(self):
+        """Run the pre-flight checks shared by the scripts.
+
+        Returns (client, None) on success or (None, message) on failure.
+        """
+        if not _ensure_genai():
+            return None, _MSG_NO_GENAI
+        client = self._get_client()
+        if not client:
+            return None, _MSG_NO_API_KEY
+        return client, None
+
     def _show_dialog(self):
         """Show the main Gemini dialog."""
-        if not GENAI_AVAILABLE:
+        if not _ensure_genai():
             # Translators: Error when google-genai is not installed
             # Translators: Error when the bundled Google GenAI library fails to load
             ui.message(
@@ -552,27 +690,22 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 
         client = self._get_client()
         if not client:
-            ui.message(_(NO_API_KEY_MSG))
+            ui.message(_MSG_NO_API_KEY)
             return
 
-        from . import maindialog
+        md = _get_maindialog()
 
         # Check if dialog already open
-        if (
-            maindialog.addToSession
-            and isinstance(maindialog.addToSession, maindialog.GeminiDialog)
-        ):
-            maindialog.addToSession.Raise()
-            maindialog.addToSession.SetFocus()
+        if md.addToSession and isinstance(md.addToSession, md.GeminiDialog):
+            md.addToSession.Raise()
+            md.addToSession.SetFocus()
             return
 
         wx.CallAfter(self._open_dialog, client)
 
     def _open_dialog(self, client):
         """Open dialog on main thread."""
-        from . import maindialog
-
-        dlg = maindialog.GeminiDialog(
+        dlg = _get_maindialog().GeminiDialog(
             gui.mainFrame,
             client=client,
             conf_ref=config.conf,
@@ -590,30 +723,17 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
             scale: Scale factor to reduce resolution (0.5 = half size)
         """
         try:
-            # Add mss to path if available
-            if LIBS_DIR not in sys.path:
-                sys.path.insert(0, LIBS_DIR)
+            path = os.path.join(DATA_DIR, f"screenshot_{self._capture_name()}.png")
 
-            import mss
-            import datetime
-            from PIL import Image
-
-            now = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            path = os.path.join(DATA_DIR, f"screenshot_{now}.png")
-
-            with mss.mss() as sct:
-                # Capture primary monitor
-                img = sct.grab(sct.monitors[1])
-                # Convert to PIL Image
-                pil_img = Image.frombytes("RGB", img.size, img.bgra, "raw", "BGRX")
-
-                # Resize to reduce file size
-                if scale < 1.0:
-                    new_size = (int(pil_img.width * scale), int(pil_img.height * scale))
-                    pil_img = pil_img.resize(new_size, Image.Resampling.LANCZOS)
+            sct = self._get_mss()
+            # Capture primary monitor
+            img = sct.grab(sct.monitors[1])
 
-                # Save with compression
-                pil_img.save(path, "PNG", optimize=True)
+            # Resize to reduce file size
+            new_size = None
+            if scale < 1.0:
+                new_size = (int(img.width * scale), int(img.height * scale))
+            _save_shot(img, path, new_size)
 
             return path
         except ImportError:
@@ -623,48 +743,45 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
             log.error(f"Screenshot failed: {e}")
             return None
 
-    def _capture_object(self, scale: float = 0.75) -> str | None:
-        """Capture navigator object and return path to image.
+    def _get_navigator_rect(self) -> dict | None:
+        """Scroll the navigator object into view and return its screen rectangle.
 
-        Args:
-            scale: Scale factor to reduce resolution (0.75 = 75% size)
+        Must run on the main thread since it talks to the accessibility APIs.
         """
         try:
-            if LIBS_DIR not in sys.path:
-                sys.path.insert(0, LIBS_DIR)
-
-            import mss
-            import datetime
-            from PIL import Image
-
             nav = api.getNavigatorObject()
             if not nav or not nav.location:
                 return None
 
             nav.scrollIntoView()
             loc = nav.location
-
-            now = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            path = os.path.join(DATA_DIR, f"object_{now}.png")
-
-            monitor = {
+            return {
                 "top": loc.top,
                 "left": loc.left,
                 "width": loc.width,
                 "height": loc.height,
             }
+        except Exception as e:
+            log.error(f"Failed to get navigator object location: {e}")
+            return None
+
+    def _capture_object(self, monitor: dict, scale: float = 0.75) -> str | None:
+        """Capture a screen rectangle (the navigator object) and return path to image.
 
-            with mss.mss() as sct:
-                img = sct.grab(monitor)
-                pil_img = Image.frombytes("RGB", img.size, img.bgra, "raw", "BGRX")
+        Args:
+            monitor: Rectangle to capture, as returned by _get_navigator_rect
+            scale: Scale factor to reduce resolution (0.75 = 75% size)
+        """
+        try:
+            path = os.path.join(DATA_DIR, f"object_{self._capture_name()}.png")
 
-                # Resize to reduce file size (only if image is large enough)
-                if scale < 1.0 and pil_img.width > 100 and pil_img.height > 100:
-                    new_size = (int(pil_img.width * scale), int(pil_img.height * scale))
-                    pil_img = pil_img.resize(new_size, Image.Resampling.LANCZOS)
+            img = self._get_mss().grab(monitor)
 
-                # Save with compression
-                pil_img.save(path, "PNG", optimize=True)
+            # Resize to reduce file size (only if image is large enough)
+            new_size = None
+            if scale < 1.0 and img.width > 100 and img.height > 100:
+                new_size = (int(img.width * scale), int(img.height * scale))
+            _save_shot(img, path, new_size)
 
             return path
         except ImportError as e:
@@ -674,6 +791,58 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
             log.error(f"Object capture failed: {e}")
             return None
 
+    def _capture_name(self):
+        """Timestamp plus sequence number, unique even within one second."""
+        return f"{time.strftime('%Y%m%d_%H%M%S')}_{next(self._capture_seq):04d}"
+
+    def _get_mss(self):
+        """Get the mss instance for the current thread, creating it on first use.
+
+        mss keeps its GDI handles per thread, so each capture thread needs its own
+        instance; in practice that is the single capture worker.
+        """
+        sct = getattr(self._capture_local, "sct", None)
+        if sct is None:
+            import mss
+            sct = self._capture_local.sct = mss.mss()
+        return sct
+
+    def _close_mss(self):
+        """Release the current thread's mss instance, if any."""
+        sct = getattr(self._capture_local, "sct", None)
+        if sct is not None:
+            self._capture_local.sct = None
+            sct.close()
+
+    def _get_capture_executor(self) -> ThreadPoolExecutor:
+        """Get or create the worker that runs screen captures off the main thread."""
+        if self._capture_executor is None:
+            self._capture_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="GemVDACapture"
+            )
+        return self._capture_executor
+
+    def _capture_in_background(self, capture, prompt_type: str, client, failure_msg: str):
+        """Run a capture function on the capture worker, then continue on the GUI thread."""
+        def do_capture():
+            path = capture()
+            wx.CallAfter(self._after_capture, path, prompt_type, client, failure_msg)
+
+        self._get_capture_executor().submit(do_capture)
+
+    def _after_capture(self, path: str | None, prompt_type: str, client, failure_msg: str):
+        """Add a finished capture to the Gemini dialog, opening it if needed."""
+        if not path:
+            ui.message(failure_msg)
+            return
+
+        dialog = _get_maindialog().addToSession
+        if dialog:
+            dialog.add_images([path], prompt_type=prompt_type)
+        else:
+            self._open_dialog(client)
+            wx.CallLater(500, lambda: self._add_image_to_dialog(path, prompt_type))
+
     @script(
         # Translators: Description for show dialog script
         description=_("Show Gemini AI dialog"),
@@ -688,36 +857,24 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
         gesture="kb:nvda+shift+e",
     )
     def script_describeScreen(self, gesture):
-        if not GENAI_AVAILABLE:
-            ui.message(_("Google GenAI library not installed."))
-            return
-
-        client = self._get_client()
-        if not client:
-            ui.message(_(NO_API_KEY_MSG))
+        client, err = self._ensure_client()
+        if err:
+            ui.message(err)
             return
 
-        # Translators: Message while capturing screenshot
-        ui.message(_("Capturing screen..."))
-
-        path = self._capture_screenshot()
-        if not path:
-            # Translators: Error when screenshot fails
-            ui.message(_("Failed to capture screenshot"))
-            return
+        ui.message(_MSG_CAPTURING_SCREEN)
 
-        from . import maindialog
-
-        if maindialog.addToSession:
-            maindialog.addToSession.add_images([path], prompt_type="screenshot")
-        else:
-            self._open_dialog(client)
-            wx.CallLater(500, lambda: self._add_image_to_dialog(path, "screenshot"))
+        self._capture_in_background(
+            self._capture_screenshot,
+            "screenshot",
+            client,
+            _MSG_SCREENSHOT_FAILED,
+        )
 
     def _add_image_to_dialog(self, path, prompt_type=None):
-        from . import maindialog
-        if maindialog.addToSession:
-            maindialog.addToSession.add_images([path], prompt_type=prompt_type)
+        dialog = _get_maindialog().addToSession
+        if dialog:
+            dialog.add_images([path], prompt_type=prompt_type)
 
     @script(
         # Translators: Description for describe object script
@@ -725,31 +882,24 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
         gesture="kb:nvda+shift+o",
     )
     def script_describeObject(self, gesture):
-        if not GENAI_AVAILABLE:
-            ui.message(_("Google GenAI library not installed."))
+        client, err = self._ensure_client()
+        if err:
+            ui.message(err)
             return
 
-        client = self._get_client()
-        if not client:
-            ui.message(_(NO_API_KEY_MSG))
+        monitor = self._get_navigator_rect()
+        if not monitor:
+            ui.message(_MSG_OBJECT_FAILED)
             return
 
-        # Translators: Message while capturing object
-        ui.message(_("Capturing object..."))
+        ui.message(_MSG_CAPTURING_OBJECT)
 
-        path = self._capture_object()
-        if not path:
-            # Translators: Error when object capture fails
-            ui.message(_("Failed to capture object"))
-            return
-
-        from . import maindialog
-
-        if maindialog.addToSession:
-            maindialog.addToSession.add_images([path], prompt_type="object")
-        else:
-            self._open_dialog(client)
-            wx.CallLater(500, lambda: self._add_image_to_dialog(path, "object"))
+        self._capture_in_background(
+            lambda: self._capture_object(monitor),
+            "object",
+            client,
+            _MSG_OBJECT_FAILED,
+        )
 
     def _get_video_capture(self):
         """Get or create video capture instance."""
@@ -759,42 +909,65 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 
     def _analyze_video(self, video_path: str):
         """Send video to Gemini for analysis in a background thread."""
-        import threading
+        if not _ensure_genai():
+            ui.message(_MSG_NO_GENAI)
+            return
+
+        # Snapshot settings up front so the worker thread never touches config.conf
+        cfg = get_safe_conf()
+        model_id = cfg["model"]
+        filter_md = cfg["filterMarkdown"]
+        video_prompt = cfg["videoPrompt"] or _DEFAULT_VIDEO_PROMPT
 
         def do_analysis():
             try:
                 client = self._get_client()
                 if not client:
-                    wx.CallAfter(ui.message, _(NO_API_KEY_MSG))
+                    wx.CallAfter(ui.message, _MSG_NO_API_KEY)
                     return
 
                 # Import types for proper API formatting
                 from google.genai import types
 
-                # Upload video file
-                # Translators: Message while uploading video
-                wx.CallAfter(ui.message, _("Uploading video..."))
-
-                uploaded_file = client.files.upload(
-                    file=video_path,
-                    config={"mime_type": "video/mp4"},
-                )
+                if os.path.getsize(video_path) > MAX_VIDEO_UPLOAD_BYTES:
+                    # Translators: Error when a recorded video exceeds the upload size limit
+                    wx.CallAfter(ui.message, _("Video is too large to upload"))
+                    return
 
-                # Wait for processing
-                import time
+                # Upload video file from an open handle so the SDK streams it
+                # instead of buffering it. The script has already announced that
+                # the video is being sent, so no separate "uploading" message here.
+                upload_start = time.monotonic()
+                with open(video_path, "rb") as f:
+                    uploaded_file = client.files.upload(
+                        file=f,
+                        config={"mime_type": "video/mp4"},
+                    )
+
+                # Wait for processing, polling less often the longer it takes
+                delay = 0.25
+                deadline = time.monotonic() + _VIDEO_PROCESSING_TIMEOUT
                 while uploaded_file.state.name == "PROCESSING":
-                    time.sleep(1)
+                    if time.monotonic() >= deadline:
+                        # Translators: Error when the uploaded video is still processing after the wait limit
+                        wx.CallAfter(ui.message, _("Video processing timed out"))
+                        try:
+                            client.files.delete(name=uploaded_file.name)
+                        except Exception:
+                            pass
+                        return
+                    time.sleep(delay)
                     uploaded_file = client.files.get(name=uploaded_file.name)
+                    delay = min(delay * 1.5, 4.0)
 
                 if uploaded_file.state.name == "FAILED":
                     wx.CallAfter(ui.message, _("Video processing failed"))
                     return
 
-                # Translators: Message while analyzing video
-                wx.CallAfter(ui.message, _("Analyzing video..."))
-
-                # Get model from config
-                model_id = get_safe_conf()["model"]
+                # Only report progress if the user has been waiting a while
+                if time.monotonic() - upload_start > 2.0:
+                    # Translators: Message while analyzing video
+                    wx.CallAfter(ui.message, _("Analyzing video..."))
 
                 # Create content with video and prompt
                 response = client.models.generate_content(
@@ -807,17 +980,17 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
                                     file_uri=uploaded_file.uri,
                                     mime_type="video/mp4",
                                 ),
-                                types.Part(text=get_safe_conf()["videoPrompt"] or _("Describe this video in detail, but concise. Get as much information as you can and if there is any important text in the video read it.")),
+                                types.Part(text=video_prompt),
                             ],
                         )
                     ],
                 )
 
                 # Get the response text
-                result_text = response.text if response.text else _("No response from AI")
+                result_text = response.text if response.text else _MSG_NO_RESPONSE
 
                 # Apply markdown filter if enabled
-                if get_safe_conf()["filterMarkdown"]:
+                if filter_md:
                     from .mdfilter import filter_markdown
                     result_text = filter_markdown(result_text)
 
@@ -853,10 +1026,6 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
         gesture="kb:nvda+v",
     )
     def script_toggleVideoCapture(self, gesture):
-        if not GENAI_AVAILABLE:
-            ui.message(_("Google GenAI library not installed."))
-            return
-
         capture = self._get_video_capture()
 
         if not capture.is_available:
@@ -878,6 +1047,13 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
                 # Translators: Error when video save fails
                 ui.message(_("Failed to save video"))
         else:
+            # Check for a usable client before recording; stopping must work
+            # regardless, and _analyze_video checks again for the result
+            err = self._ensure_client()[1]
+            if err:
+                ui.message(err)
+                return
+
             # Start recording
             if capture.start():
                 # Translators: Message when video recording starts
@@ -892,13 +1068,9 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
         gesture="kb:nvda+shift+u",
     )
     def script_summarizeSelection(self, gesture):
-        if not GENAI_AVAILABLE:
-            ui.message(_("Google GenAI library not installed."))
-            return
-
-        client = self._get_client()
-        if not client:
-            ui.message(_(NO_API_KEY_MSG))
+        client, err = self._ensure_client()
+        if err:
+            ui.message(err)
             return
 
         # Get selected text via treeInterceptor (browse mode) or focus object
@@ -918,20 +1090,14 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
             ui.message(_("No text selected"))
             return
 
-        # Translators: Message while summarizing text
-        ui.message(_("Summarizing..."))
-
-        import threading
+        ui.message(_MSG_SUMMARIZING)
 
         def do_summarize():
             try:
                 from google.genai import types
 
                 # Get the summarize prompt from config or use localized default
-                prompt = get_safe_conf()["summarizePrompt"]
-                if not prompt:
-                    # Translators: Default prompt used when summarizing selected text with AI
-                    prompt = _("Summarize the key points of the following text in a clear and concise manner:")
+                prompt = get_safe_conf()["summarizePrompt"] or _DEFAULT_SUMMARIZE_PROMPT
 
                 full_prompt = f"{prompt}\n\n{selected_text}"
 
@@ -946,7 +1112,7 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
                     ],
                 )
 
-                result_text = response.text if response.text else _("No response from AI")
+                result_text = response.text if response.text else _MSG_NO_RESPONSE
 
                 if get_safe_conf()["filterMarkdown"]:
                     from .mdfilter import filter_markdown
@@ -971,13 +1137,9 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
         gesture="kb:nvda+shift+h",
     )
     def script_summarizeLastSpeech(self, gesture):
-        if not GENAI_AVAILABLE:
-            ui.message(_("Google GenAI library not installed."))
-            return
-
-        client = self._get_client()
-        if not client:
-            ui.message(_(NO_API_KEY_MSG))
+        client, err = self._ensure_client()
+        if err:
+            ui.message(err)
             return
 
         last_text = self._last_speech
@@ -986,19 +1148,13 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
             ui.message(_("No speech history available"))
             return
 
-        # Translators: Message while summarizing last speech
-        ui.message(_("Summarizing..."))
-
-        import threading
+        ui.message(_MSG_SUMMARIZING)
 
         def do_summarize():
             try:
                 from google.genai import types
 
-                prompt = get_safe_conf()["summarizeSpeechPrompt"]
-                if not prompt:
-                    # Translators: Default prompt used when summarizing the last spoken text with AI
-                    prompt = _("Summarize the following text concisely. Respond in the same language as the text:")
+                prompt = get_safe_conf()["summarizeSpeechPrompt"] or _DEFAULT_SUMMARIZE_SPEECH_PROMPT
 
                 full_prompt = f"{prompt}\n\n{last_text}"
 
@@ -1013,7 +1169,7 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
                     ],
                 )
 
-                result_text = response.text if response.text else _("No response from AI")
+                result_text = response.text if response.text else _MSG_NO_RESPONSE
 
                 if get_safe_conf()["filterMarkdown"]:
                     from .mdfilter import filter_markdown
@@ -2,29 +2,126 @@
 # -*- coding: utf-8 -*-
 
 import os
+import threading
 import ctypes
 import ctypes.wintypes
 from logHandler import log
 
+# Windows needs O_BINARY for raw reads; it doesn't exist elsewhere
+_O_BINARY = getattr(os, "O_BINARY", 0)
+
 
 class DPAPIError(Exception):
     """Exception raised when DPAPI operations fail."""
     pass
 
 
+# DPAPI structures
+class DATA_BLOB(ctypes.Structure):
+    _fields_ = [
+        ("cbData", ctypes.wintypes.DWORD),
+        ("pbData", ctypes.c_void_p),
+    ]
+
+
+_PDATA_BLOB = ctypes.POINTER(DATA_BLOB)
+
+# Private library handles with prototypes declared once. use_last_error makes
+# ctypes.get_last_error() meaningful, and not touching ctypes.windll keeps the
+# prototypes from affecting other callers in NVDA.
+_crypt32 = ctypes.WinDLL("crypt32", use_last_error=True)
+_kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+
+for _func in (_crypt32.CryptProtectData, _crypt32.CryptUnprotectData):
+    _func.argtypes = [
+        _PDATA_BLOB,  # pDataIn
+        ctypes.wintypes.LPCWSTR,  # szDataDescr / ppszDataDescr
+        _PDATA_BLOB,  # pOptionalEntropy
+        ctypes.c_void_p,  # pvReserved
+        ctypes.c_void_p,  # pPromptStruct
+        ctypes.wintypes.DWORD,  # dwFlags
+        _PDATA_BLOB,  # pDataOut
+    ]
+    _func.restype = ctypes.wintypes.BOOL
+for _func in (_crypt32.CryptProtectMemory, _crypt32.CryptUnprotectMemory):
+    _func.argtypes = [ctypes.c_void_p, ctypes.wintypes.DWORD, ctypes.wintypes.DWORD]
+    _func.restype = ctypes.wintypes.BOOL
+_kernel32.LocalFree.argtypes = [ctypes.c_void_p]
+_kernel32.LocalFree.restype = ctypes.c_void_p
+del _func
+
+
 class DPAPI:
     """Windows Data Protection API wrapper for encrypting/decrypting data."""
 
-    # DPAPI structures
-    class DATA_BLOB(ctypes.Structure):
-        _fields_ = [
-            ("cbData", ctypes.wintypes.DWORD),
-            ("pbData", ctypes.POINTER(ctypes.c_char)),
-        ]
+    DATA_BLOB = DATA_BLOB
+
+    # CryptProtectMemory works on whole blocks of this size
+    CRYPTPROTECTMEMORY_BLOCK_SIZE = 16
+    # Only this process can unprotect the memory
+    CRYPTPROTECTMEMORY_SAME_PROCESS = 0x0
 
     def __init__(self):
-        self._crypt32 = ctypes.windll.crypt32
-        self._kernel32 = ctypes.windll.kernel32
+        # Input buffer and blob reused across calls, grown when too small
+        self._in_buf = ctypes.create_string_buffer(256)
+        self._in_blob = DATA_BLOB()
+        self._in_blob.pbData = ctypes.addressof(self._in_buf)
+        self._lock = threading.Lock()
+
+    def _load_input(self, data: bytes) -> DATA_BLOB:
+        """Copy data into the reusable input buffer and return its blob.
+
+        Must be called with self._lock held.
+        """
+        n = len(data)
+        if n > len(self._in_buf):
+            self._in_buf = ctypes.create_string_buffer(1 << (n - 1).bit_length())
+            self._in_blob.pbData = ctypes.addressof(self._in_buf)
+        ctypes.memmove(self._in_buf, data, n)
+        self._in_blob.cbData = n
+        return self._in_blob
+
+    def _clear_input(self):
+        """Wipe what _load_input copied in. Must be called with self._lock held."""
+        ctypes.memset(self._in_buf, 0, self._in_blob.cbData)
+
+    def encrypt_memory(self, data: str) -> tuple[ctypes.Array, int]:
+        """
+        Encrypt a string in memory with CryptProtectMemory.
+        Returns the protected buffer and the length of the plaintext. The
+        result is only usable within this process, which makes it much cheaper
+        than CryptProtectData for keeping a secret around between calls.
+        """
+        data_bytes = data.encode("utf-8")
+        block = self.CRYPTPROTECTMEMORY_BLOCK_SIZE
+        size = -(-len(data_bytes) // block) * block or block
+        buf = ctypes.create_string_buffer(data_bytes, size)
+
+        if not _crypt32.CryptProtectMemory(
+            buf, size, self.CRYPTPROTECTMEMORY_SAME_PROCESS
+        ):
+            error_code = ctypes.get_last_error()
+            raise DPAPIError(f"CryptProtectMemory failed with error code: {error_code}")
+
+        return buf, len(data_bytes)
+
+    def decrypt_memory(self, buf: ctypes.Array, length: int) -> str:
+        """
+        Decrypt a buffer returned by encrypt_memory.
+        Works on a copy, so the protected buffer can be decrypted again later.
+        """
+        size = len(buf)
+        plain = ctypes.create_string_buffer(buf.raw, size)
+        try:
+            if not _crypt32.CryptUnprotectMemory(
+                plain, size, self.CRYPTPROTECTMEMORY_SAME_PROCESS
+            ):
+                error_code = ctypes.get_last_error()
+                raise DPAPIError(f"CryptUnprotectMemory failed with error code: {error_code}")
+            return plain.raw[:length].decode("utf-8")
+        finally:
+            # Don't leave the plaintext behind in the scratch buffer
+            ctypes.memset(plain, 0, size)
 
     def encrypt(self, data: str) -> bytes:
         """
@@ -33,28 +130,26 @@ class DPAPI:
         """
         data_bytes = data.encode("utf-8")
 
-        # Input blob
-        input_blob = self.DATA_BLOB()
-        input_blob.cbData = len(data_bytes)
-        input_blob.pbData = ctypes.cast(
-            ctypes.create_string_buffer(data_bytes, len(data_bytes)),
-            ctypes.POINTER(ctypes.c_char)
-        )
-
         # Output blob
-        output_blob = self.DATA_BLOB()
-
-        # Call CryptProtectData
-        # Flags: CRYPTPROTECT_UI_FORBIDDEN (0x1) - don't show UI
-        result = self._crypt32.CryptProtectData(
-            ctypes.byref(input_blob),  # pDataIn
-            None,  # szDataDescr (optional description)
-            None,  # pOptionalEntropy (additional entropy)
-            None,  # pvReserved
-            None,  # pPromptStruct
-            0x1,   # dwFlags - CRYPTPROTECT_UI_FORBIDDEN
-            ctypes.byref(output_blob)  # pDataOut
-        )
+        output_blob = DATA_BLOB()
+
+        with self._lock:
+            input_blob = self._load_input(data_bytes)
+            try:
+                # Call CryptProtectData
+                # Flags: CRYPTPROTECT_UI_FORBIDDEN (0x1) - don't show UI
+                result = _crypt32.CryptProtectData(
+                    ctypes.byref(input_blob),  # pDataIn
+                    None,  # szDataDescr (optional description)
+                    None,  # pOptionalEntropy (additional entropy)
+                    None,  # pvReserved
+                    None,  # pPromptStruct
+                    0x1,   # dwFlags - CRYPTPROTECT_UI_FORBIDDEN
+                    ctypes.byref(output_blob)  # pDataOut
+                )
+            finally:
+                # The input is the plaintext key; don't keep it around
+                self._clear_input()
 
         if not result:
             error_code = ctypes.get_last_error()
@@ -64,7 +159,7 @@ class DPAPI:
         encrypted_data = ctypes.string_at(output_blob.pbData, output_blob.cbData)
 
         # Free the memory allocated by DPAPI
-        self._kernel32.LocalFree(output_blob.pbData)
+        _kernel32.LocalFree(output_blob.pbData)
 
         return encrypted_data
 
@@ -73,27 +168,21 @@ class DPAPI:
         Decrypt data that was encrypted with Windows DPAPI.
         Must be decrypted by the same Windows user who encrypted it.
         """
-        # Input blob
-        input_blob = self.DATA_BLOB()
-        input_blob.cbData = len(encrypted_data)
-        input_blob.pbData = ctypes.cast(
-            ctypes.create_string_buffer(encrypted_data, len(encrypted_data)),
-            ctypes.POINTER(ctypes.c_char)
-        )
-
         # Output blob
-        output_blob = self.DATA_BLOB()
-
-        # Call CryptUnprotectData
-        result = self._crypt32.CryptUnprotectData(
-            ctypes.byref(input_blob),  # pDataIn
-            None,  # ppszDataDescr
-            None,  # pOptionalEntropy
-            None,  # pvReserved
-            None,  # pPromptStruct
-            0x1,   # dwFlags - CRYPTPROTECT_UI_FORBIDDEN
-            ctypes.byref(output_blob)  # pDataOut
-        )
+        output_blob = DATA_BLOB()
+
+        with self._lock:
+            input_blob = self._load_input(encrypted_data)
+            # Call CryptUnprotectData
+            result = _crypt32.CryptUnprotectData(
+                ctypes.byref(input_blob),  # pDataIn
+                None,  # ppszDataDescr
+                None,  # pOptionalEntropy
+                None,  # pvReserved
+                None,  # pPromptStruct
+                0x1,   # dwFlags - CRYPTPROTECT_UI_FORBIDDEN
+                ctypes.byref(output_blob)  # pDataOut
+            )
 
         if not result:
             error_code = ctypes.get_last_error()
@@ -103,7 +192,7 @@ class DPAPI:
         decrypted_data = ctypes.string_at(output_blob.pbData, output_blob.cbData)
 
         # Free the memory allocated by DPAPI
-        self._kernel32.LocalFree(output_blob.pbData)
+        _kernel32.LocalFree(output_blob.pbData)
 
         return decrypted_data.decode("utf-8")
 
@@ -111,7 +200,7 @@ class DPAPI:
 class APIKeyManager:
     """Manages Gemini API key storage and retrieval with encryption."""
 
-    ENV_VAR_NAMES = ["GEMINI_API_KEY", "GOOGLE_API_KEY"]
+    ENV_VAR_NAMES = ("GEMINI_API_KEY", "GOOGLE_API_KEY")
 
     def __init__(self, data_dir: str):
         self.data_dir = data_dir
@@ -119,6 +208,19 @@ class APIKeyManager:
         self._legacy_key_file = os.path.join(data_dir, "gemini.key")
         self._dpapi = DPAPI()
 
+        # Key from key_file, valid while the file's mtime is unchanged. Held
+        # as a CryptProtectMemory buffer and its plaintext length rather than
+        # as a plain string. get_api_key is called from worker threads, so
+        # the cache is only touched with _cache_lock held.
+        self._cache_lock = threading.Lock()
+        self._cached_key = None
+        self._cached_mtime = None
+        # Whether key_file exists, as far as this manager knows. The file is
+        # only written through save_api_key, so while this is False there is
+        # nothing to stat and env-var keys are used directly. Read and set
+        # with _cache_lock held, together with the file change it tracks.
+        self._file_seen = os.path.exists(self.key_file)
+
         # Migrate legacy plaintext key if exists
         self._migrate_legacy_key()
 
@@ -138,34 +240,78 @@ class APIKeyManager:
                     else:
                         log.warning("Failed to migrate API key to encrypted storage")
             except Exception as e:
-                log.error(f"Error migrating legacy API key: {e}")
+                log.error("Error migrating legacy API key: %s", e)
 
-    def get_api_key(self) -> str | None:
-        """
-        Get the API key from encrypted file or environment variable.
-        Priority: encrypted file > GEMINI_API_KEY > GOOGLE_API_KEY
-        """
-        # Try encrypted file first
-        if os.path.exists(self.key_file):
+    def _get_file_key(self) -> str | None:
+        """Get the key stored in the encrypted file, decrypting only when it changed."""
+        with self._cache_lock:
+            if not self._file_seen:
+                return None
             try:
-                with open(self.key_file, "rb") as f:
-                    encrypted_data = f.read()
+                st = os.stat(self.key_file)
+            except OSError:
+                self._file_seen = False
+                self._invalidate_cache()
+                return None
+
+            if st.st_mtime_ns != self._cached_mtime:
+                key = None
+                cached_key = None
+                try:
+                    # The file is tiny; read it in one call without a buffered reader
+                    fd = os.open(self.key_file, os.O_RDONLY | _O_BINARY)
+                    try:
+                        encrypted_data = os.read(fd, st.st_size)
+                    finally:
+                        os.close(fd)
                     if encrypted_data:
                         key = self._dpapi.decrypt(encrypted_data)
                         if key:
-                            return key
+                            cached_key = self._dpapi.encrypt_memory(key)
+                except DPAPIError as e:
+                    log.error("Error decrypting API key: %s", e)
+                except Exception as e:
+                    log.error("Error reading API key file: %s", e)
+                # Update both together, once the file has been dealt with
+                self._cached_key = cached_key
+                self._cached_mtime = st.st_mtime_ns
+                return key or None
+
+            if self._cached_key is None:
+                return None
+            try:
+                return self._dpapi.decrypt_memory(*self._cached_key)
             except DPAPIError as e:
-                log.error(f"Error decrypting API key: {e}")
-            except Exception as e:
-                log.error(f"Error reading API key file: {e}")
+                log.error("Error unprotecting cached API key: %s", e)
+                self._invalidate_cache()
+                return None
+
+    def _invalidate_cache(self):
+        """Forget the cached key. Must be called with self._cache_lock held."""
+        self._cached_key = None
+        self._cached_mtime = None
+
+    def _resolve_api_key(self) -> tuple[str | None, str]:
+        """
+        Find the API key and where it comes from.
+        Priority: encrypted file > GEMINI_API_KEY > GOOGLE_API_KEY
+        """
+        # Try encrypted file first
+        key = self._get_file_key()
+        if key:
+            return key, "encrypted file"
 
         # Try environment variables
         for env_var in self.ENV_VAR_NAMES:
             key = os.environ.get(env_var, "").strip()
             if key:
-                return key
+                return key, f"environment ({env_var})"
 
-        return None
+        return None, "none"
+
+    def get_api_key(self) -> str | None:
+        """Get the API key from encrypted file or environment variable."""
+        return self._resolve_api_key()[0]
 
     def save_api_key(self, key: str) -> bool:
         """Save the API key to encrypted file using Windows DPAPI."""
@@ -176,29 +322,35 @@ class APIKeyManager:
             # Encrypt the key
             encrypted_data = self._dpapi.encrypt(key.strip())
 
-            # Write encrypted data
-            with open(self.key_file, "wb") as f:
-                f.write(encrypted_data)
-
+            # Write encrypted data; holding the lock keeps a lookup that
+            # doesn't find the file yet from marking it missing afterwards
+            with self._cache_lock:
+                with open(self.key_file, "wb") as f:
+                    f.write(encrypted_data)
+                self._file_seen = True
+                self._invalidate_cache()
             return True
         except DPAPIError as e:
-            log.error(f"Error encrypting API key: {e}")
+            log.error("Error encrypting API key: %s", e)
             return False
         except Exception as e:
-            log.error(f"Error saving API key: {e}")
+            log.error("Error saving API key: %s", e)
             return False
 
     def delete_api_key(self) -> bool:
         """Delete the stored API key."""
         try:
-            if os.path.exists(self.key_file):
-                os.remove(self.key_file)
+            with self._cache_lock:
+                if os.path.exists(self.key_file):
+                    os.remove(self.key_file)
+                self._file_seen = False
+                self._invalidate_cache()
             # Also remove legacy file if exists
             if os.path.exists(self._legacy_key_file):
                 os.remove(self._legacy_key_file)
             return True
         except Exception as e:
-            log.error(f"Error deleting API key: {e}")
+            log.error("Error deleting API key: %s", e)
             return False
 
     def is_ready(self) -> bool:
@@ -207,19 +359,7 @@ class APIKeyManager:
 
     def get_key_source(self) -> str:
         """Get where the API key is coming from."""
-        if os.path.exists(self.key_file):
-            try:
-                with open(self.key_file, "rb") as f:
-                    if f.read():
-                        return "encrypted file"
-            except Exception:
-                pass
-
-        for env_var in self.ENV_VAR_NAMES:
-            if os.environ.get(env_var, "").strip():
-                return f"environment ({env_var})"
-
-        return "none"
+        return self._resolve_api_key()[1]
 
 
 # Global instance
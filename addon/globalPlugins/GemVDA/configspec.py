@@ -2,6 +2,9 @@
 # -*- coding: utf-8 -*-
 
 import re
+from types import MappingProxyType
+
+import config
 
 confSpecs = {
     # Model settings
@@ -19,6 +22,8 @@ confSpecs = {
     "conversationMode": "boolean(default=True)",
     "saveSystemPrompt": "boolean(default=True)",
     "customSystemPrompt": 'string(default="")',
+    # Conversation turns kept in the dialog (0 = keep everything)
+    "maxRetainedHistory": "integer(min=0, max=1000, default=100)",
 
     # UI settings
     "blockEscapeKey": "boolean(default=False)",
@@ -62,102 +67,173 @@ confSpecs = {
 }
 
 
-def _parse_default(spec_string):
-    """Extract the default value from a configobj spec string."""
-    m = re.search(r"default=(['\"])(.*?)\1", spec_string)
+_DEFAULT_QUOTED = re.compile(r"default=(['\"])(.*?)\1")
+_DEFAULT_BARE = re.compile(r"default=([^,)\s]+)")
+
+# Spec kind -> (parse raw default, coerce value read from config)
+_KINDS = {
+    "boolean": (
+        lambda raw: raw.lower() == "true",
+        lambda v: v if isinstance(v, bool) else str(v).lower() == "true",
+    ),
+    "integer": (int, lambda v: v if isinstance(v, int) else int(v)),
+    "float": (float, lambda v: v if isinstance(v, float) else float(v)),
+}
+
+
+def _parse_spec(spec_string):
+    """Extract the (coerce, default) pair from a configobj spec string.
+
+    coerce is None for strings, which need no coercion.
+    """
+    parse, coerce = _KINDS.get(spec_string.split("(", 1)[0], (None, None))
+    m = _DEFAULT_QUOTED.search(spec_string)
     if m:
-        return m.group(2)
-    m = re.search(r"default=(\S+)", spec_string)
+        return coerce, m.group(2)
+    m = _DEFAULT_BARE.search(spec_string)
     if m:
-        raw = m.group(1).rstrip(",)")
-        if spec_string.startswith("boolean"):
-            return raw.lower() == "true"
-        if spec_string.startswith("integer"):
-            return int(raw)
-        if spec_string.startswith("float"):
-            return float(raw)
-        return raw
-    return None
-
-
-def _parse_type(spec_string):
-    """Extract the type coercion function from a configobj spec string."""
-    if spec_string.startswith("boolean"):
-        return lambda v: v if isinstance(v, bool) else str(v).lower() == "true"
-    if spec_string.startswith("integer"):
-        return lambda v: v if isinstance(v, int) else int(v)
-    if spec_string.startswith("float"):
-        return lambda v: v if isinstance(v, float) else float(v)
-    return None  # strings need no coercion
-
-
-def _build_defaults(specs):
-    """Build a nested dict of default values from confSpecs."""
+        raw = m.group(1)
+        return coerce, parse(raw) if parse else raw
+    return coerce, None
+
+
+def _build_meta(specs):
+    """Build per-key metadata from confSpecs.
+
+    Each key maps to (coerce, default, sub_meta): sub_meta is the nested
+    metadata dict for subsections and None for plain values.
+    """
     result = {}
     for key, value in specs.items():
         if isinstance(value, dict):
-            result[key] = _build_defaults(value)
+            result[key] = (None, None, _build_meta(value))
         else:
-            result[key] = _parse_default(value)
+            result[key] = (*_parse_spec(value), None)
     return result
 
 
-def _build_types(specs):
-    """Build a nested dict of type coercion functions from confSpecs."""
-    result = {}
-    for key, value in specs.items():
-        if isinstance(value, dict):
-            result[key] = _build_types(value)
+def _flatten(meta, prefix=()):
+    """Yield (key path, coerce, default) for every value in the metadata tree."""
+    for key, (coerce, default, sub_meta) in meta.items():
+        path = prefix + (key,)
+        if sub_meta is not None:
+            yield from _flatten(sub_meta, path)
         else:
-            result[key] = _parse_type(value)
-    return result
+            yield path, coerce, default
+
+
+_META = _build_meta(confSpecs)
+
+# Read-only views of the spec, keyed by path tuples like ("images", "maxWidth")
+_DEFAULTS_FLAT = MappingProxyType({path: default for path, _, default in _flatten(_META)})
+_TYPES_FLAT = MappingProxyType({path: coerce for path, coerce, _ in _flatten(_META)})
 
 
-_DEFAULTS = _build_defaults(confSpecs)
-_TYPES = _build_types(confSpecs)
+class _EmptySection:
+    """Stand-in for a config section that doesn't exist; writes are dropped."""
+
+    def __getitem__(self, key):
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        pass
+
+    def __contains__(self, key):
+        return False
+
+
+_EMPTY_SECTION = _EmptySection()
 
 
 class _SafeSection:
     """Wraps an NVDA config section, falling back to confSpec defaults on KeyError."""
 
-    def __init__(self, conf_section, defaults, types=None):
+    def __init__(self, conf_section, meta, path=()):
         self._conf = conf_section
-        self._defaults = defaults
-        self._types = types or {}
+        self._meta = meta
+        # Keys leading from the GemVDA root to this section
+        self._path = path
+        # Wrappers for subsections, reused while the underlying section is the same
+        self._sub_wrappers = {}
 
     def __getitem__(self, key):
+        meta = self._meta.get(key)
+        if meta is None:
+            return self._conf[key]
+        coerce, default, sub_meta = meta
+
+        if sub_meta is not None:
+            # Wrap sub-sections so nested access is also safe
+            try:
+                val = self._conf[key]
+            except KeyError:
+                val = _EMPTY_SECTION
+            wrapper = self._sub_wrappers.get(key)
+            if wrapper is None or wrapper._conf is not val:
+                wrapper = self._sub_wrappers[key] = _SafeSection(
+                    val, sub_meta, self._path + (key,)
+                )
+            return wrapper
+
         try:
             val = self._conf[key]
         except KeyError:
-            if key not in self._defaults:
-                raise
-            val = self._defaults[key]
-        # Wrap sub-sections so nested access is also safe
-        sub_defaults = self._defaults.get(key, {})
-        sub_types = self._types.get(key, {})
-        if isinstance(sub_defaults, dict) and sub_defaults:
-            if not isinstance(val, (str, bytes, bool, int, float, type(None))):
-                return _SafeSection(val, sub_defaults, sub_types)
+            return default
         # Coerce to the expected type (configobj returns strings from ini)
-        coerce = self._types.get(key)
         if coerce is not None and val is not None:
             try:
                 val = coerce(val)
             except (ValueError, TypeError):
-                val = self._defaults.get(key, val)
+                val = default
         return val
 
     def __setitem__(self, key, value):
         self._conf[key] = value
 
     def __contains__(self, key):
-        return key in self._conf or key in self._defaults
+        # Every spec'd key is in _meta, which is a small plain dict
+        return key in self._meta or key in self._conf
 
-    def get(self, key, default=None):
+    def get_path(self, *keys):
+        """Read a nested value, e.g. get_path("feedback", "soundRequestSent").
+
+        Walks the raw config directly instead of wrapping each subsection.
+        """
+        full_path = self._path + keys
+        cur = self._conf
         try:
-            return self[key]
+            for key in keys:
+                cur = cur[key]
         except KeyError:
-            return default
+            return _DEFAULTS_FLAT[full_path]
+        coerce = _TYPES_FLAT.get(full_path)
+        if coerce is not None and cur is not None:
+            try:
+                cur = coerce(cur)
+            except (ValueError, TypeError):
+                cur = _DEFAULTS_FLAT[full_path]
+        return cur
+
+    def get(self, key, default=None):
+        # Spec'd keys always resolve, to the config value or the spec default
+        if key in self._meta:
+            return self[key]
+        if key in self._conf:
+            return self._conf[key]
+        return default
+
+
+# Wrapper returned by get_safe_conf, reused while config.conf hands back the
+# same GemVDA section object
+_cached_conf = None
+
+
+def _invalidate_cached_conf(**kwargs):
+    global _cached_conf
+    _cached_conf = None
+
+
+config.post_configProfileSwitch.register(_invalidate_cached_conf)
 
 
 def get_safe_conf():
@@ -166,13 +242,12 @@ def get_safe_conf():
     Use this instead of config.conf["GemVDA"] to avoid KeyError when
     NVDA's config profiles don't have the expected keys.
     """
-    import config
+    global _cached_conf
     try:
         section = config.conf["GemVDA"]
     except KeyError:
-        return _SafeSection(type('Empty', (), {
-            '__getitem__': lambda s, k: (_ for _ in ()).throw(KeyError(k)),
-            '__setitem__': lambda s, k, v: None,
-            '__contains__': lambda s, k: False,
-        })(), _DEFAULTS, _TYPES)
-    return _SafeSection(section, _DEFAULTS, _TYPES)
+        section = _EMPTY_SECTION
+    cached = _cached_conf
+    if cached is None or cached._conf is not section:
+        cached = _cached_conf = _SafeSection(section, _META)
+    return cached
@@ -3,7 +3,9 @@
 
 import os
 import struct
+import sys
 import globalVars
+from logHandler import log
 
 # Directory paths
 ADDON_DIR = os.path.dirname(__file__)
@@ -14,8 +16,7 @@ _arch = "lib64" if struct.calcsize("P") == 8 else "lib32"
 LIBS_DIR = os.path.join(ADDON_ROOT, _arch)
 
 # Create data directory if it doesn't exist
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
+os.makedirs(DATA_DIR, exist_ok=True)
 
 # Sound files
 SOUNDS_DIR = os.path.join(ADDON_DIR, "sounds")
@@ -24,8 +25,22 @@ SND_CHAT_RESPONSE_PENDING = os.path.join(SOUNDS_DIR, "chatResponsePending.wav")
 SND_CHAT_RESPONSE_RECEIVED = os.path.join(SOUNDS_DIR, "chatResponseReceived.wav")
 SND_PROGRESS = os.path.join(SOUNDS_DIR, "progress.wav")
 
-# Default system prompt for accessibility
-DEFAULT_SYSTEM_PROMPT = """You are a helpful AI assistant integrated with NVDA, a screen reader for blind and visually impaired users.
+# Sound files actually present, checked once so playback needs no disk access
+AVAILABLE_SOUNDS = frozenset(
+    p for p in (
+        SND_CHAT_REQUEST_SENT,
+        SND_CHAT_RESPONSE_PENDING,
+        SND_CHAT_RESPONSE_RECEIVED,
+        SND_PROGRESS,
+    )
+    if os.path.isfile(p)
+)
+if len(AVAILABLE_SOUNDS) < 4:
+    log.warning(f"GemVDA sound files missing from {SOUNDS_DIR}; cues will be silent")
+
+# Default system prompt for accessibility. The long constant strings are
+# interned so every request shares the same object.
+DEFAULT_SYSTEM_PROMPT = sys.intern("""You are a helpful AI assistant integrated with NVDA, a screen reader for blind and visually impaired users.
 
 When describing visual content:
 - Be thorough and descriptive, as users cannot see the content
@@ -43,12 +58,23 @@ For code and technical content:
 - Explain code structure and logic clearly
 - Mention indentation and nesting levels when relevant
 - Describe error messages and their likely causes
-"""
+""")
 
 # Gemini model definitions
 class Model:
     """Represents a Gemini model with its capabilities."""
 
+    __slots__ = (
+        "id",
+        "name",
+        "context_window",
+        "max_output_tokens",
+        "max_temperature",
+        "vision",
+        "preview",
+        "thinking",
+    )
+
     def __init__(
         self,
         id: str,
@@ -148,27 +174,44 @@ GEMINI_MODELS = [
 DEFAULT_MODEL = "gemini-3.1-flash-lite-preview"
 DEFAULT_VISION_MODEL = "gemini-3.1-flash-lite-preview"
 
+# Model lookup tables, built once from the static list above
+_MODEL_BY_ID = {m.id: m for m in GEMINI_MODELS}
+_MODEL_INDEX_BY_ID = {m.id: i for i, m in enumerate(GEMINI_MODELS)}
+_MODEL_CHOICES = [(m.id, m.name) for m in GEMINI_MODELS]
+_VISION_MODELS = [m for m in GEMINI_MODELS if m.vision]
+
 # Model lookup helpers
 def get_model_by_id(model_id: str) -> Model | None:
     """Get a model by its ID."""
-    for model in GEMINI_MODELS:
-        if model.id == model_id:
-            return model
-    return None
+    return _MODEL_BY_ID.get(model_id)
+
+def get_model_index(model_id: str) -> int:
+    """Get a model's position in GEMINI_MODELS, or 0 if it is unknown."""
+    return _MODEL_INDEX_BY_ID.get(model_id, 0)
 
 def get_model_choices() -> list[tuple[str, str]]:
     """Get list of (id, name) tuples for UI choices."""
-    return [(m.id, m.name) for m in GEMINI_MODELS]
+    return list(_MODEL_CHOICES)
 
 def get_vision_models() -> list[Model]:
     """Get models with vision capability."""
-    return [m for m in GEMINI_MODELS if m.vision]
+    return list(_VISION_MODELS)
+
+# Largest file the Gemini Files API accepts (2 GB)
+MAX_VIDEO_UPLOAD_BYTES = 2 * 1024 * 1024 * 1024
+
+# Conversation mode sends at most this many history messages verbatim; once
+# exceeded, all but the most recent HISTORY_KEEP_RECENT are sent as a summary
+MAX_HISTORY_MESSAGES = 50
+HISTORY_KEEP_RECENT = 20
+# Characters of each older message kept in that summary
+HISTORY_SUMMARY_CHARS = 150
 
 # Default prompts for image descriptions
-DEFAULT_SCREENSHOT_PROMPT = "Describe this screenshot in detail. What application or content is shown? What are the main elements visible on screen?"
+DEFAULT_SCREENSHOT_PROMPT = sys.intern("Describe this screenshot in detail. What application or content is shown? What are the main elements visible on screen?")
 
-DEFAULT_OBJECT_PROMPT = "Describe this UI element or object in detail. What is it? What does it show or do?"
+DEFAULT_OBJECT_PROMPT = sys.intern("Describe this UI element or object in detail. What is it? What does it show or do?")
 
 # Error messages
-NO_API_KEY_MSG = "No Gemini API key configured. Please add your API key in the settings."
+NO_API_KEY_MSG = sys.intern("No Gemini API key configured. Please add your API key in the settings.")
 API_ERROR_MSG = "Error communicating with Gemini API: {error}"
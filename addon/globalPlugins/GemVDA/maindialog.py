@@ -2,14 +2,17 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import sys
 import threading
-import base64
 import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 import wx
 import winsound
 
 import addonHandler
+import api
 import config
 import ui
 import braille
@@ -27,14 +30,19 @@ from .consts import (
     DEFAULT_OBJECT_PROMPT,
     GEMINI_MODELS,
     get_model_by_id,
+    get_model_index,
     get_model_choices,
     SND_CHAT_REQUEST_SENT,
     SND_CHAT_RESPONSE_PENDING,
     SND_CHAT_RESPONSE_RECEIVED,
+    AVAILABLE_SOUNDS,
+    MAX_HISTORY_MESSAGES,
+    HISTORY_KEEP_RECENT,
+    HISTORY_SUMMARY_CHARS,
 )
 from .configspec import get_safe_conf
 from .resultevent import EVT_RESULT, ResultEvent
-from .mdfilter import filter_markdown
+from .mdfilter import filter_markdown, filter_markdown_stream
 
 # Add lib directory to path for google-genai
 if LIBS_DIR not in sys.path:
@@ -55,6 +63,20 @@ addToSession = None
 conf = None
 
 
+# End of a sentence or line in streamed text; speech is held back until one
+# arrives, or until the stream goes quiet for _SPEECH_FLUSH_MS
+_SENTENCE_END = re.compile(r"[.!?](?=\s)|\n")
+_SPEECH_FLUSH_MS = 300
+
+
+def _format_message_text(role: str, text: str) -> str:
+    """Prefix message text with its role label, as read or copied with Alt+number."""
+    # Translators: Label for user messages when reading history
+    # Translators: Label for Gemini messages when reading history
+    role_label = _("You") if role == "user" else _("Gemini")
+    return _("{role}: {text}").format(role=role_label, text=text)
+
+
 class HistoryBlock:
     """Represents a message in the conversation history."""
 
@@ -62,8 +84,60 @@ class HistoryBlock:
         self.role = role  # "user" or "model"
         self.text = text
         self.images = images or []
-        self.videos = videos or []  # List of (path, uploaded_file) tuples
+        self.videos = videos or []  # List of (path, uploaded_file, mime_type) tuples
         self.focused = False
+        # types.Content sent for this block, built on the first send after
+        # the block is complete and reused by later sends
+        self.content = None
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @text.setter
+    def text(self, value: str):
+        self._text = value or ""
+        # Markdown-filtered form of the text, and while the text is still
+        # streaming, the state that lets it be updated as the text grows
+        # without filtering it all again
+        self._streaming = False
+        self._filter_state = None
+        self._filtered = None
+        # Text as read or copied with Alt+number, and the text it came from
+        self._formatted = None
+        self.content = None
+
+    def append(self, chunk: str):
+        """Add streamed text without discarding the filtered paragraphs so far."""
+        self._text += chunk
+        self._streaming = True
+        self._filtered = None
+        self._formatted = None
+        self.content = None
+
+    def finish(self):
+        """Mark streamed text as complete, so it is filtered as a whole."""
+        if self._streaming:
+            self._streaming = False
+            self._filter_state = None
+            self._filtered = None
+
+    def get_filtered(self) -> str:
+        """Get the text with markdown removed, filtering only what is new while streaming."""
+        if self._filtered is None:
+            if self._streaming:
+                self._filtered, self._filter_state = filter_markdown_stream(
+                    self._text, self._filter_state
+                )
+            else:
+                self._filtered = filter_markdown(self._text)
+        return self._filtered
+
+    def get_formatted(self, text: str) -> str:
+        """Get text, this block's raw or filtered text, with its role label."""
+        if self._formatted is None or self._formatted[0] != text:
+            self._formatted = (text, _format_message_text(self.role, text))
+        return self._formatted[1]
 
 
 # Supported video formats and their MIME types
@@ -80,6 +154,39 @@ VIDEO_MIME_TYPES = {
     ".3gpp": "video/3gpp",
 }
 
+# Supported image formats and their MIME types
+IMAGE_MIME_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+
+# Images larger than this are sent through the Files API instead of inline
+_IMAGE_UPLOAD_THRESHOLD = 1_000_000
+
+# File dialog pattern for the supported video formats
+_VIDEO_WILDCARD = ";".join(f"*{ext}" for ext in VIDEO_MIME_TYPES)
+
+
+def _video_entry(path: str) -> tuple[str, str]:
+    """Pair a video path with its MIME type, worked out once on attach."""
+    ext = os.path.splitext(path)[1].lower()
+    return path, VIDEO_MIME_TYPES.get(ext, "video/mp4")
+
+
+def _control_len(text: str) -> int:
+    """Length of text in text control positions, which count UTF-16 code units."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+# Streamed text is held back until this many characters have accumulated or
+# this many seconds have passed since the last post to the dialog, whichever
+# comes first
+_MIN_CHUNK_CHARS = 64
+_CHUNK_INTERVAL = 0.05
+
 
 class CompletionThread(threading.Thread):
     """Background thread for Gemini API calls."""
@@ -92,6 +199,7 @@ class CompletionThread(threading.Thread):
         contents: list,
         config_obj,
         stream: bool = True,
+        image_loader=None,
     ):
         threading.Thread.__init__(self, daemon=True)
         self._notify_window = notify_window
@@ -100,7 +208,14 @@ class CompletionThread(threading.Thread):
         self._contents = contents
         self._config = config_obj
         self._stream = stream
+        self._image_loader = image_loader
         self._stop_event = threading.Event()
+        # Streamed text not yet posted, and the timer that posts it if no
+        # more text arrives in time
+        self._pending_lock = threading.Lock()
+        self._pending = ""
+        self._pending_timer = None
+        self._last_post = 0.0
 
     def _safe_post_event(self, data):
         """Safely post event to window, handling case where window is destroyed."""
@@ -111,8 +226,32 @@ class CompletionThread(threading.Thread):
             # Window was destroyed
             pass
 
+    def _build_contents(self) -> list:
+        """Turn (block, parts) pairs into Content, loading image paths on this thread.
+
+        The Content is stored on the block so later sends reuse it as is.
+        """
+        contents = []
+        for item in self._contents:
+            if not isinstance(item, tuple):
+                contents.append(item)
+                continue
+            block, parts = item
+            resolved = []
+            for part in parts:
+                if isinstance(part, str):
+                    part = self._image_loader(part)
+                    if part is None:
+                        continue
+                resolved.append(part)
+            if resolved:
+                block.content = types.Content(role=block.role, parts=resolved)
+                contents.append(block.content)
+        return contents
+
     def run(self):
         try:
+            self._contents = self._build_contents()
             if self._stream:
                 self._run_streaming()
             else:
@@ -122,7 +261,7 @@ class CompletionThread(threading.Thread):
             self._safe_post_event({"error": str(e)})
 
     def _run_streaming(self):
-        response_text = ""
+        parts: list[str] = []
         try:
             response = self._client.models.generate_content_stream(
                 model=self._model_id,
@@ -130,18 +269,57 @@ class CompletionThread(threading.Thread):
                 config=self._config,
             )
 
+            # Coalesce small chunks so the UI and speech aren't hit per token
+            self._last_post = time.monotonic()
             for chunk in response:
                 if self._stop_event.is_set():
                     break
                 if chunk.text:
-                    response_text += chunk.text
-                    self._safe_post_event({"chunk": chunk.text, "done": False})
+                    parts.append(chunk.text)
+                    self._queue_chunk(chunk.text)
 
-            self._safe_post_event({"text": response_text, "done": True})
+            with self._pending_lock:
+                self._post_pending()
+            self._safe_post_event({"text": "".join(parts), "done": True})
         except Exception as e:
+            with self._pending_lock:
+                self._cancel_pending_timer()
             log.error(f"Streaming error: {e}", exc_info=True)
             self._safe_post_event({"error": str(e)})
 
+    def _queue_chunk(self, text: str):
+        """Post streamed text once enough has built up, or schedule it for later."""
+        with self._pending_lock:
+            self._pending += text
+            waited = time.monotonic() - self._last_post
+            if len(self._pending) >= _MIN_CHUNK_CHARS or waited >= _CHUNK_INTERVAL:
+                self._post_pending()
+            elif self._pending_timer is None:
+                # Post it anyway when the interval is up, so a slow stream
+                # doesn't leave the text waiting for the next chunk
+                self._pending_timer = threading.Timer(
+                    _CHUNK_INTERVAL - waited, self._on_pending_timer
+                )
+                self._pending_timer.daemon = True
+                self._pending_timer.start()
+
+    def _on_pending_timer(self):
+        with self._pending_lock:
+            self._post_pending()
+
+    def _post_pending(self):
+        """Post any held-back text. Called with _pending_lock held."""
+        self._cancel_pending_timer()
+        if self._pending:
+            self._safe_post_event({"chunk": self._pending, "done": False})
+            self._pending = ""
+        self._last_post = time.monotonic()
+
+    def _cancel_pending_timer(self):
+        if self._pending_timer is not None:
+            self._pending_timer.cancel()
+            self._pending_timer = None
+
     def _run_sync(self):
         try:
             response = self._client.models.generate_content(
@@ -176,10 +354,11 @@ class GeminiDialog(wx.Dialog):
         self._client = client
         self._conf = conf_ref
         self._history: list[HistoryBlock] = []
+        self._last_response: HistoryBlock | None = None  # Latest model block with text
         self._current_thread: CompletionThread | None = None
         self._pending_images: list[str] = []  # Paths to images to send
-        self._pending_videos: list[str] = []  # Paths to videos to send
-        self._uploaded_videos: list[tuple] = []  # (path, uploaded_file) tuples
+        self._pending_videos: list[tuple[str, str]] = []  # (path, mime_type) of videos to send
+        self._uploaded_videos: list[tuple] = []  # (path, uploaded_file, mime_type) tuples
 
         # For double-press detection on Alt+number keys
         self._last_message_key: int | None = None
@@ -188,10 +367,32 @@ class GeminiDialog(wx.Dialog):
 
         # Track streaming state for speech
         self._received_streaming_chunks = False
+        self._speech_buffer = ""
+        self._speech_timer: wx.CallLater | None = None
 
         # Track current prompt type for saving (screenshot, object, or None)
         self._current_prompt_type: str | None = None
 
+        # Image parts keyed by (path, mtime_ns, size), filled by completion threads
+        self._image_part_cache: dict[tuple[str, int, int], "types.Part"] = {}
+
+        # Leading history blocks sent as a single summary in conversation mode
+        self._summarized_blocks = 0
+        self._history_summary = None
+
+        # Settings read on the streaming path, refreshed on each send and on
+        # profile switches so chunk handling never goes through get_safe_conf
+        self._conf_snapshot = self._snapshot_conf()
+        config.post_configProfileSwitch.register(self._on_profile_switch)
+
+        # Incremental history rendering: number of blocks rendered for good
+        # and the length of each in the control, plus the last block and its
+        # text as currently shown
+        self._rendered_blocks = 0
+        self._rendered_sizes: list[int] = []
+        self._tail_block: HistoryBlock | None = None
+        self._tail_text = ""
+
         self._init_ui()
         self._bind_events()
 
@@ -201,6 +402,30 @@ class GeminiDialog(wx.Dialog):
         self.SetSize((800, 600))
         self.CenterOnParent()
 
+    @staticmethod
+    def _snapshot_conf() -> SimpleNamespace:
+        """Read the settings the dialog consults on every event in one go."""
+        cfg = get_safe_conf()
+        return SimpleNamespace(
+            filter_markdown=cfg["filterMarkdown"],
+            block_escape=cfg["blockEscapeKey"],
+            conversation_mode=cfg["conversationMode"],
+            max_retained_history=cfg["maxRetainedHistory"],
+            stream=cfg["stream"],
+            sound_sent=cfg.get_path("feedback", "soundRequestSent"),
+            sound_pending=cfg.get_path("feedback", "soundResponsePending"),
+            sound_received=cfg.get_path("feedback", "soundResponseReceived"),
+            speak_response=cfg.get_path("feedback", "speechResponseReceived"),
+            braille_response=cfg.get_path("feedback", "brailleAutoFocus"),
+            temperature=cfg["temperature"],
+            top_p=cfg["topP"],
+            top_k=cfg["topK"],
+            max_output_tokens=cfg["maxOutputTokens"],
+        )
+
+    def _on_profile_switch(self, **kwargs):
+        self._conf_snapshot = self._snapshot_conf()
+
     def focus_prompt(self):
         """Focus the prompt text field and raise the dialog."""
         try:
@@ -225,13 +450,7 @@ class GeminiDialog(wx.Dialog):
         self._model_choice = wx.Choice(panel, choices=model_choices)
 
         # Set default model
-        current_model = get_safe_conf()["model"]
-        for i, m in enumerate(GEMINI_MODELS):
-            if m.id == current_model:
-                self._model_choice.SetSelection(i)
-                break
-        else:
-            self._model_choice.SetSelection(0)
+        self._model_choice.SetSelection(get_model_index(get_safe_conf()["model"]))
 
         model_sizer.Add(self._model_choice, 1, wx.EXPAND)
         main_sizer.Add(model_sizer, 0, wx.EXPAND | wx.ALL, 10)
@@ -338,7 +557,7 @@ class GeminiDialog(wx.Dialog):
 
         # Escape to close (if not blocked)
         if key == wx.WXK_ESCAPE:
-            if not get_safe_conf()["blockEscapeKey"]:
+            if not self._conf_snapshot.block_escape:
                 self._on_close(None)
                 return
 
@@ -380,14 +599,8 @@ class GeminiDialog(wx.Dialog):
 
     def _format_message(self, block: HistoryBlock) -> str:
         """Format a single message for reading or copying."""
-        text = block.text or ""
-        if get_safe_conf()["filterMarkdown"]:
-            text = filter_markdown(text)
-
-        # Translators: Label for user messages when reading history
-        # Translators: Label for Gemini messages when reading history
-        role_label = _("You") if block.role == "user" else _("Gemini")
-        return _("{role}: {text}").format(role=role_label, text=text)
+        text = block.get_filtered() if self._conf_snapshot.filter_markdown else block.text
+        return block.get_formatted(text)
 
     def _read_message_by_index(self, index: int):
         """Read the message at the given index (0 = most recent)."""
@@ -396,18 +609,16 @@ class GeminiDialog(wx.Dialog):
             ui.message(_("No messages in history"))
             return
 
-        # Get messages in reverse order (most recent first)
-        reversed_history = list(reversed(self._history))
-
-        if index >= len(reversed_history):
+        if index >= len(self._history):
             # Translators: Message when requested message doesn't exist
             ui.message(_("Message {num} not available. Only {total} message(s) in history.").format(
                 num=index + 1,
-                total=len(reversed_history)
+                total=len(self._history)
             ))
             return
 
-        block = reversed_history[index]
+        # Index 0 is the most recent message
+        block = self._history[-(index + 1)]
         message_text = self._format_message(block)
 
         if message_text.strip():
@@ -418,32 +629,26 @@ class GeminiDialog(wx.Dialog):
 
     def _copy_message_by_index(self, index: int):
         """Copy the message at the given index to clipboard."""
-        import api as nvda_api
-
         if not self._history:
             # Translators: Message when there are no messages to copy
             ui.message(_("No messages to copy"))
             return
 
-        # Get messages in reverse order (most recent first)
-        reversed_history = list(reversed(self._history))
-
-        if index >= len(reversed_history):
+        if index >= len(self._history):
             # Translators: Message when requested message for copying doesn't exist
             ui.message(_("Message {num} not available. Only {total} message(s) in history.").format(
                 num=index + 1,
-                total=len(reversed_history)
+                total=len(self._history)
             ))
             return
 
-        block = reversed_history[index]
+        # Index 0 is the most recent message
+        block = self._history[-(index + 1)]
         # For copying, just copy the text content without the role label
-        text = block.text or ""
-        if get_safe_conf()["filterMarkdown"]:
-            text = filter_markdown(text)
+        text = block.get_filtered() if self._conf_snapshot.filter_markdown else block.text
 
         if text.strip():
-            nvda_api.copyToClip(text)
+            api.copyToClip(text)
             # Translators: Message when a message is copied to clipboard
             ui.message(_("Message {num} copied to clipboard").format(num=index + 1))
         else:
@@ -468,64 +673,60 @@ class GeminiDialog(wx.Dialog):
             ).start()
             return
 
+        # Pick up settings changed since the last send
+        self._conf_snapshot = conf_snapshot = self._snapshot_conf()
+
         # Get selected model
         model_idx = self._model_choice.GetSelection()
         model = GEMINI_MODELS[model_idx]
 
-        # Build contents for API using proper types
+        # Build contents for API: Content already sent for a block is reused,
+        # other blocks go as (block, parts) pairs whose image paths are left
+        # in place and loaded by the completion thread
         contents = []
 
         # Add system instruction
         system_prompt = self._system_text.GetValue().strip()
 
         # Build conversation history
-        if get_safe_conf()["conversationMode"]:
-            for block in self._history:
+        if conf_snapshot.conversation_mode:
+            self._trim_or_summarize_history()
+            if self._history_summary is not None:
+                contents.append(self._history_summary)
+            for block in self._history[self._summarized_blocks:]:
+                if block.content is not None:
+                    contents.append(block.content)
+                    continue
                 content_parts = []
                 if block.text:
                     # Create Part with text keyword argument
                     content_parts.append(types.Part(text=block.text))
-                # Re-encode images from stored paths
+                # Images from stored paths
                 for img_path in block.images:
                     if isinstance(img_path, str):
-                        img_part = self._encode_image(img_path)
-                        if img_part:
-                            content_parts.append(img_part)
+                        content_parts.append(img_path)
                 # Add video references from history
                 for video_info in block.videos:
-                    if isinstance(video_info, tuple) and len(video_info) == 2:
-                        path, uploaded_file = video_info
+                    if isinstance(video_info, tuple) and len(video_info) == 3:
+                        path, uploaded_file, mime_type = video_info
                         if uploaded_file:
-                            ext = os.path.splitext(path)[1].lower()
-                            mime_type = VIDEO_MIME_TYPES.get(ext, "video/mp4")
                             content_parts.append(types.Part.from_uri(
                                 file_uri=uploaded_file.uri,
                                 mime_type=mime_type,
                             ))
 
                 if content_parts:
-                    contents.append(types.Content(
-                        role=block.role,
-                        parts=content_parts
-                    ))
+                    contents.append((block, content_parts))
 
         # Build current message parts
         current_parts = []
 
         # Add images first
-        for img_path in self._pending_images:
-            try:
-                img_data = self._encode_image(img_path)
-                if img_data:
-                    current_parts.append(img_data)
-            except Exception as e:
-                log.error(f"Error encoding image: {e}")
+        current_parts.extend(self._pending_images)
 
         # Add uploaded videos
-        for path, uploaded_file in self._uploaded_videos:
+        for path, uploaded_file, mime_type in self._uploaded_videos:
             if uploaded_file:
-                ext = os.path.splitext(path)[1].lower()
-                mime_type = VIDEO_MIME_TYPES.get(ext, "video/mp4")
                 current_parts.append(types.Part.from_uri(
                     file_uri=uploaded_file.uri,
                     mime_type=mime_type,
@@ -535,21 +736,21 @@ class GeminiDialog(wx.Dialog):
         if prompt:
             current_parts.append(types.Part(text=prompt))
 
-        contents.append(types.Content(role="user", parts=current_parts))
-
         # Add to history
         user_block = HistoryBlock(
             "user", prompt, self._pending_images.copy(), self._uploaded_videos.copy()
         )
+        contents.append((user_block, current_parts))
         self._history.append(user_block)
         self._update_history_display()
 
         # Save prompt if we have a prompt type (screenshot or object)
         if self._current_prompt_type and prompt:
+            cfg = get_safe_conf()
             if self._current_prompt_type == "screenshot":
-                get_safe_conf()["screenshotPrompt"] = prompt
+                cfg["screenshotPrompt"] = prompt
             elif self._current_prompt_type == "object":
-                get_safe_conf()["objectPrompt"] = prompt
+                cfg["objectPrompt"] = prompt
             # Reset prompt type after saving
             self._current_prompt_type = None
             # Save config
@@ -568,16 +769,16 @@ class GeminiDialog(wx.Dialog):
         self._send_btn.Disable()
 
         # Play send sound
-        if get_safe_conf()["feedback"]["soundRequestSent"]:
+        if conf_snapshot.sound_sent:
             self._play_sound(SND_CHAT_REQUEST_SENT)
 
         # Create generation config
         gen_config = types.GenerateContentConfig(
             system_instruction=system_prompt if system_prompt else None,
-            temperature=get_safe_conf()["temperature"],
-            top_p=get_safe_conf()["topP"],
-            top_k=get_safe_conf()["topK"],
-            max_output_tokens=get_safe_conf()["maxOutputTokens"],
+            temperature=conf_snapshot.temperature,
+            top_p=conf_snapshot.top_p,
+            top_k=conf_snapshot.top_k,
+            max_output_tokens=conf_snapshot.max_output_tokens,
         )
 
         # Start completion thread
@@ -587,42 +788,95 @@ class GeminiDialog(wx.Dialog):
             model_id=model.id,
             contents=contents,
             config_obj=gen_config,
-            stream=get_safe_conf()["stream"],
+            stream=conf_snapshot.stream,
+            image_loader=self._encode_image,
         )
         self._current_thread.start()
 
         # Start pending sound
-        if get_safe_conf()["feedback"]["soundResponsePending"]:
+        if conf_snapshot.sound_pending:
             self._play_sound(SND_CHAT_RESPONSE_PENDING, loop=True)
 
-    def _encode_image(self, path: str) -> dict | None:
-        """Encode an image file to base64 for API."""
+    def _drop_old_history(self):
+        """Forget the oldest turns once more than maxRetainedHistory are held."""
+        max_blocks = self._conf_snapshot.max_retained_history * 2
+        if not max_blocks or len(self._history) <= max_blocks:
+            return
+        dropped = len(self._history) - max_blocks
+        del self._history[:dropped]
+        # Dropped blocks already folded into the summary stay covered by it
+        self._summarized_blocks = max(0, self._summarized_blocks - dropped)
+        self._remove_rendered_blocks(dropped)
+
+    def _trim_or_summarize_history(self):
+        """Fold older history into a summary once too many messages would be sent.
+
+        The summary only changes when the limit is exceeded again, so the
+        start of what is sent stays the same from one send to the next.
+        """
+        if len(self._history) - self._summarized_blocks <= MAX_HISTORY_MESSAGES:
+            return
+        self._summarized_blocks = len(self._history) - HISTORY_KEEP_RECENT
+        lines = []
+        for block in self._history[:self._summarized_blocks]:
+            text = " ".join(block.text.split())
+            if len(text) > HISTORY_SUMMARY_CHARS:
+                text = text[:HISTORY_SUMMARY_CHARS] + "..."
+            if block.images:
+                text += f" ({len(block.images)} image(s))"
+            if block.videos:
+                text += f" ({len(block.videos)} video(s))"
+            lines.append(f"- {block.role}: {text}")
+        summary = "[Summary of prior conversation]:\n" + "\n".join(lines)
+        self._history_summary = types.Content(role="user", parts=[types.Part(text=summary)])
+        log.debug(f"Summarized {self._summarized_blocks} history messages")
+
+    def _encode_image(self, path: str) -> "types.Part | None":
+        """Load an image file as a Part, reusing it while the file is unchanged.
+
+        Called from the completion thread, not the UI thread.
+        """
         try:
-            with open(path, "rb") as f:
-                data = f.read()
+            st = os.stat(path)
+            key = (path, st.st_mtime_ns, st.st_size)
+            part = self._image_part_cache.get(key)
+            if part is not None:
+                return part
 
             # Determine mime type
             ext = os.path.splitext(path)[1].lower()
-            mime_types = {
-                ".jpg": "image/jpeg",
-                ".jpeg": "image/jpeg",
-                ".png": "image/png",
-                ".gif": "image/gif",
-                ".webp": "image/webp",
-            }
-            mime_type = mime_types.get(ext, "image/jpeg")
-
-            return types.Part.from_bytes(data=data, mime_type=mime_type)
+            mime_type = IMAGE_MIME_TYPES.get(ext, "image/jpeg")
+
+            if st.st_size > _IMAGE_UPLOAD_THRESHOLD:
+                # Let the SDK stream large images rather than holding them in memory
+                uploaded_file = self._client.files.upload(
+                    file=path,
+                    config={"mime_type": mime_type},
+                )
+                part = types.Part.from_uri(
+                    file_uri=uploaded_file.uri,
+                    mime_type=mime_type,
+                )
+            else:
+                with open(path, "rb") as f:
+                    data = f.read()
+                part = types.Part.from_bytes(data=data, mime_type=mime_type)
+            self._image_part_cache[key] = part
+            return part
         except Exception as e:
             log.error(f"Error encoding image {path}: {e}")
             return None
 
     def _on_result(self, event):
         data = event.data
+        conf_snapshot = self._conf_snapshot
 
         if "error" in data:
-            # Stop pending sound
+            # Stop pending sound and drop the unfinished sentence
             winsound.PlaySound(None, winsound.SND_PURGE)
+            self._cancel_speech()
+            if self._history and self._history[-1].role == "model":
+                self._history[-1].finish()
 
             # Translators: Error message prefix
             error_msg = _("Error: {error}").format(error=data["error"])
@@ -634,20 +888,16 @@ class GeminiDialog(wx.Dialog):
         if "chunk" in data and not data.get("done"):
             # Streaming chunk - append to history display
             if self._history and self._history[-1].role == "model":
-                self._history[-1].text += data["chunk"]
+                self._history[-1].append(data["chunk"])
             else:
-                self._history.append(HistoryBlock("model", data["chunk"]))
+                self._last_response = HistoryBlock("model")
+                self._last_response.append(data["chunk"])
+                self._history.append(self._last_response)
             self._update_history_display()
 
-            # Speak streaming chunk immediately
-            if get_safe_conf()["feedback"]["speechResponseReceived"]:
-                chunk_text = data["chunk"]
-                if chunk_text:
-                    # Apply markdown filter if enabled
-                    if get_safe_conf()["filterMarkdown"]:
-                        chunk_text = filter_markdown(chunk_text)
-                    if chunk_text.strip():  # Only speak non-empty chunks
-                        self._speak_long_text(chunk_text)
+            # Speak streamed text a sentence at a time
+            if conf_snapshot.speak_response and data["chunk"]:
+                self._queue_speech(data["chunk"])
 
             # Track that we received streaming chunks
             self._received_streaming_chunks = True
@@ -657,75 +907,171 @@ class GeminiDialog(wx.Dialog):
             # Stop pending sound
             winsound.PlaySound(None, winsound.SND_PURGE)
 
+            # Speak whatever is left of the last sentence
+            self._flush_speech()
+
             # Final response
-            was_streaming = getattr(self, '_received_streaming_chunks', False)
+            was_streaming = self._received_streaming_chunks
             if "text" in data:
                 if self._history and self._history[-1].role == "model":
                     # Already accumulated from streaming
-                    pass
+                    self._history[-1].finish()
                 else:
-                    self._history.append(HistoryBlock("model", data["text"]))
+                    block = HistoryBlock("model", data["text"])
+                    self._history.append(block)
+                    if block.text:
+                        self._last_response = block
 
+            self._drop_old_history()
             self._update_history_display()
             self._send_btn.Enable()
 
             # Play received sound
-            if get_safe_conf()["feedback"]["soundResponseReceived"]:
+            if conf_snapshot.sound_received:
                 self._play_sound(SND_CHAT_RESPONSE_RECEIVED)
 
+            # Text to present, filtered once for both speech and braille
+            response_text = self._history[-1].text if self._history else ""
+            if response_text and conf_snapshot.filter_markdown:
+                response_text = self._history[-1].get_filtered()
+
             # Announce response (only if not streaming, since we already spoke chunks)
-            if get_safe_conf()["feedback"]["speechResponseReceived"] and not was_streaming:
-                response_text = self._history[-1].text if self._history else ""
-                if response_text:
-                    # Apply markdown filter if enabled
-                    if get_safe_conf()["filterMarkdown"]:
-                        response_text = filter_markdown(response_text)
-                    # Split into paragraphs to avoid speech synth buffer limits
-                    self._speak_long_text(response_text)
+            if conf_snapshot.speak_response and not was_streaming and response_text:
+                # Split into paragraphs to avoid speech synth buffer limits
+                self._speak_long_text(response_text)
 
             # Update braille
-            if get_safe_conf()["feedback"]["brailleAutoFocus"]:
-                response_text = self._history[-1].text if self._history else ""
-                if response_text:
-                    # Apply markdown filter if enabled
-                    if get_safe_conf()["filterMarkdown"]:
-                        response_text = filter_markdown(response_text)
-                    braille.handler.message(response_text)
+            if conf_snapshot.braille_response and response_text:
+                braille.handler.message(response_text)
 
             # Reset streaming flag for next request
             self._received_streaming_chunks = False
 
-    def _update_history_display(self):
-        """Update the history text control."""
-        lines = []
-        for block in self._history:
-            # Translators: Label for user messages in history
-            role_label = _("You") if block.role == "user" else _("Gemini")
-            text = block.text or ""
-
-            # Apply markdown filter to model responses if enabled
-            if block.role == "model" and get_safe_conf()["filterMarkdown"]:
-                text = filter_markdown(text)
-
-            # Build attachment indicators
-            attachments = []
-            if block.images:
-                # Translators: Indicator for attached images
-                attachments.append(_("{count} image(s)").format(count=len(block.images)))
-            if block.videos:
-                # Translators: Indicator for attached videos
-                attachments.append(_("{count} video(s)").format(count=len(block.videos)))
-
-            if attachments:
-                attachment_text = ", ".join(attachments)
-                text = f"[{attachment_text}] {text}"
+    def _render_block(self, block: HistoryBlock, first: bool) -> str:
+        """Render one history block as it appears in the messages field."""
+        # Translators: Label for user messages in history
+        role_label = _("You") if block.role == "user" else _("Gemini")
+        text = block.text
+
+        # Apply markdown filter to model responses if enabled
+        if block.role == "model" and self._conf_snapshot.filter_markdown:
+            text = block.get_filtered()
+
+        # Build attachment indicators
+        attachments = []
+        if block.images:
+            # Translators: Indicator for attached images
+            attachments.append(_("{count} image(s)").format(count=len(block.images)))
+        if block.videos:
+            # Translators: Indicator for attached videos
+            attachments.append(_("{count} video(s)").format(count=len(block.videos)))
+
+        if attachments:
+            attachment_text = ", ".join(attachments)
+            text = f"[{attachment_text}] {text}"
+
+        # Blocks are separated by a blank line
+        return f"{role_label}: {text}\n" if first else f"\n{role_label}: {text}\n"
+
+    def _reset_history_display(self):
+        """Forget what has been rendered so the next update starts from scratch."""
+        self._history_text.SetValue("")
+        self._rendered_blocks = 0
+        self._rendered_sizes = []
+        self._tail_block = None
+        self._tail_text = ""
 
-            lines.append(f"{role_label}: {text}")
-            lines.append("")
+    def _update_history_display(self):
+        """Update the history text control.
 
-        self._history_text.SetValue("\n".join(lines))
+        Blocks before the last one never change once rendered, so only new
+        blocks are appended and the last block, which grows while a response
+        streams, is patched in place from the first character that changed.
+        """
+        ctrl = self._history_text
+        ctrl.Freeze()
+        try:
+            self._render_history_delta()
+        finally:
+            ctrl.Thaw()
         # Scroll to end
-        self._history_text.SetInsertionPointEnd()
+        ctrl.SetInsertionPointEnd()
+
+    def _render_history_delta(self):
+        """Bring the history control up to date with self._history."""
+        history = self._history
+        count = len(history)
+        rendered = self._rendered_blocks + (self._tail_block is not None)
+        if count < rendered or (
+            self._tail_block is not None
+            and history[self._rendered_blocks] is not self._tail_block
+        ):
+            # History was cleared or trimmed; rebuild
+            self._reset_history_display()
+
+        # A block arrived after the tail: bring the tail up to date and commit it
+        if self._tail_block is not None and count > self._rendered_blocks + 1:
+            self._replace_tail(
+                self._render_block(self._tail_block, self._rendered_blocks == 0)
+            )
+            self._rendered_blocks += 1
+            self._rendered_sizes.append(_control_len(self._tail_text))
+            self._tail_block = None
+            self._tail_text = ""
+
+        # Append new blocks in one call
+        new_blocks = history[self._rendered_blocks:count - 1]
+        if new_blocks:
+            texts = [
+                self._render_block(block, self._rendered_blocks + i == 0)
+                for i, block in enumerate(new_blocks)
+            ]
+            self._history_text.AppendText("".join(texts))
+            self._rendered_blocks += len(new_blocks)
+            self._rendered_sizes.extend(_control_len(text) for text in texts)
+
+        if count > self._rendered_blocks:
+            block = history[-1]
+            text = self._render_block(block, self._rendered_blocks == 0)
+            if self._tail_block is block:
+                self._replace_tail(text)
+            else:
+                self._history_text.AppendText(text)
+                self._tail_block = block
+                self._tail_text = text
+
+    def _remove_rendered_blocks(self, count: int):
+        """Remove the text of the first count blocks, which left the history."""
+        if count > self._rendered_blocks:
+            # The block being patched went too; rebuild
+            self._reset_history_display()
+            return
+        end = sum(self._rendered_sizes[:count])
+        del self._rendered_sizes[:count]
+        self._rendered_blocks -= count
+        # The new first block loses the newline that separated it from the
+        # one before, as _render_block leaves it off the first block
+        if self._rendered_sizes:
+            self._rendered_sizes[0] -= 1
+            end += 1
+        elif self._tail_block is not None:
+            self._tail_text = self._tail_text[1:]
+            end += 1
+        self._history_text.Remove(0, end)
+
+    def _replace_tail(self, text: str):
+        """Replace the rendered text of the last block, touching only what changed."""
+        old = self._tail_text
+        if text == old:
+            return
+        common = len(os.path.commonprefix((old, text)))
+        stale = old[common:]
+        if stale:
+            # Control positions count UTF-16 code units, not code points
+            end = self._history_text.GetLastPosition()
+            self._history_text.Remove(end - _control_len(stale), end)
+        self._history_text.AppendText(text[common:])
+        self._tail_text = text
 
     def _on_attach_image(self, event):
         # Translators: Title of image file selection dialog
@@ -744,19 +1090,17 @@ class GeminiDialog(wx.Dialog):
         dlg.Destroy()
 
     def _on_attach_video(self, event):
-        # Build wildcard from supported formats
-        extensions = ";".join(f"*{ext}" for ext in VIDEO_MIME_TYPES.keys())
         # Translators: Title of video file selection dialog
         dlg = wx.FileDialog(
             self,
             _("Select Video"),
-            wildcard=_("Video files ({ext})|{ext}").format(ext=extensions),
+            wildcard=_("Video files ({ext})|{ext}").format(ext=_VIDEO_WILDCARD),
             style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST | wx.FD_MULTIPLE,
         )
 
         if dlg.ShowModal() == wx.ID_OK:
             paths = dlg.GetPaths()
-            self._pending_videos.extend(paths)
+            self._pending_videos.extend(map(_video_entry, paths))
             self._update_attachment_label()
 
         dlg.Destroy()
@@ -782,34 +1126,41 @@ class GeminiDialog(wx.Dialog):
     def _update_image_label(self):
         self._update_attachment_label()
 
+    def _upload_one_video(self, video_path: str, mime_type: str):
+        """Upload a video and wait until it has been processed."""
+        # Upload video file
+        uploaded_file = self._client.files.upload(
+            file=video_path,
+            config={"mime_type": mime_type},
+        )
+
+        # Wait for processing, backing off from 0.25 s up to 2 s between polls
+        delay = 0.25
+        while uploaded_file.state.name == "PROCESSING":
+            time.sleep(delay)
+            delay = min(delay * 2, 2.0)
+            uploaded_file = self._client.files.get(name=uploaded_file.name)
+        return uploaded_file
+
     def _upload_videos_and_send(self, prompt: str):
         """Upload videos in background thread, then trigger send."""
-        import time
-
         try:
-            for video_path in self._pending_videos:
-                ext = os.path.splitext(video_path)[1].lower()
-                mime_type = VIDEO_MIME_TYPES.get(ext, "video/mp4")
-
-                # Upload video file
-                uploaded_file = self._client.files.upload(
-                    file=video_path,
-                    config={"mime_type": mime_type},
-                )
-
-                # Wait for processing
-                while uploaded_file.state.name == "PROCESSING":
-                    time.sleep(1)
-                    uploaded_file = self._client.files.get(name=uploaded_file.name)
-
-                if uploaded_file.state.name == "FAILED":
-                    wx.CallAfter(
-                        ui.message,
-                        _("Video upload failed: {path}").format(path=os.path.basename(video_path))
-                    )
-                    continue
-
-                self._uploaded_videos.append((video_path, uploaded_file))
+            # Upload in parallel, but keep the results in attachment order
+            with ThreadPoolExecutor(max_workers=min(4, len(self._pending_videos))) as ex:
+                futures = [
+                    (video_path, mime_type, ex.submit(self._upload_one_video, video_path, mime_type))
+                    for video_path, mime_type in self._pending_videos
+                ]
+                for video_path, mime_type, future in futures:
+                    uploaded_file = future.result()
+                    if uploaded_file.state.name == "FAILED":
+                        wx.CallAfter(
+                            ui.message,
+                            _("Video upload failed: {path}").format(path=os.path.basename(video_path))
+                        )
+                        continue
+
+                    self._uploaded_videos.append((video_path, uploaded_file, mime_type))
 
             # Clear pending videos
             self._pending_videos.clear()
@@ -833,25 +1184,33 @@ class GeminiDialog(wx.Dialog):
 
     def _on_clear(self, event):
         self._history.clear()
+        self._last_response = None
+        self._image_part_cache.clear()
+        self._cancel_speech()
+        self._summarized_blocks = 0
+        self._history_summary = None
         self._pending_images.clear()
         self._pending_videos.clear()
         self._uploaded_videos.clear()
-        self._update_history_display()
+        self._reset_history_display()
         self._update_attachment_label()
         self._prompt_text.SetFocus()
         # Translators: Message when conversation is cleared
         ui.message(_("Conversation cleared"))
 
     def _on_copy_response(self, event):
-        if self._history:
-            # Find last model response
-            for block in reversed(self._history):
-                if block.role == "model" and block.text:
-                    import api
-                    api.copyToClip(block.text)
-                    # Translators: Message when response is copied
-                    ui.message(_("Response copied to clipboard"))
-                    return
+        block = self._last_response
+        if block is None:
+            # Fall back to searching the history for the latest model reply
+            block = next(
+                (b for b in reversed(self._history) if b.role == "model" and b.text),
+                None,
+            )
+        if block is not None:
+            api.copyToClip(block.text)
+            # Translators: Message when response is copied
+            ui.message(_("Response copied to clipboard"))
+            return
 
         # Translators: Message when there's no response to copy
         ui.message(_("No response to copy"))
@@ -864,21 +1223,61 @@ class GeminiDialog(wx.Dialog):
         if self._current_thread and self._current_thread.is_alive():
             self._current_thread.stop()
 
-        # Stop sounds
+        # Stop sounds and drop any speech still waiting for a sentence end
         winsound.PlaySound(None, winsound.SND_PURGE)
+        self._cancel_speech()
+
+        config.post_configProfileSwitch.unregister(self._on_profile_switch)
 
         # Save system prompt if enabled
-        if get_safe_conf()["saveSystemPrompt"]:
-            get_safe_conf()["customSystemPrompt"] = self._system_text.GetValue()
+        cfg = get_safe_conf()
+        if cfg["saveSystemPrompt"]:
+            cfg["customSystemPrompt"] = self._system_text.GetValue()
             # Trigger config save to persist changes
             try:
-                import config
                 config.conf.save()
             except Exception:
                 pass
 
         self.Destroy()
 
+    def _queue_speech(self, chunk: str):
+        """Buffer streamed text and speak it up to the last sentence end."""
+        self._speech_buffer += chunk
+        last = None
+        for last in _SENTENCE_END.finditer(self._speech_buffer):
+            pass
+        if last is not None:
+            self._speak_chunk(self._speech_buffer[:last.end()])
+            self._speech_buffer = self._speech_buffer[last.end():]
+
+        # Speak the remainder if nothing more arrives for a while
+        if self._speech_timer is None:
+            self._speech_timer = wx.CallLater(_SPEECH_FLUSH_MS, self._flush_speech)
+        else:
+            self._speech_timer.Start(_SPEECH_FLUSH_MS)
+
+    def _flush_speech(self):
+        """Speak any buffered streamed text now."""
+        if self._speech_timer is not None:
+            self._speech_timer.Stop()
+        text, self._speech_buffer = self._speech_buffer, ""
+        if text:
+            self._speak_chunk(text)
+
+    def _cancel_speech(self):
+        """Drop buffered streamed text without speaking it."""
+        if self._speech_timer is not None:
+            self._speech_timer.Stop()
+        self._speech_buffer = ""
+
+    def _speak_chunk(self, text: str):
+        """Speak a piece of streamed text, filtering markdown if enabled."""
+        if self._conf_snapshot.filter_markdown:
+            text = filter_markdown(text)
+        if text.strip():  # Only speak non-empty chunks
+            self._speak_long_text(text)
+
     def _speak_long_text(self, text: str):
         """Speak text split into paragraphs to avoid speech synth buffer limits."""
         # Split on double newlines (paragraphs) or single newlines for long text
@@ -890,7 +1289,7 @@ class GeminiDialog(wx.Dialog):
 
     def _play_sound(self, path: str, loop: bool = False):
         """Play a sound file."""
-        if not os.path.exists(path):
+        if path not in AVAILABLE_SOUNDS:
             return
         flags = winsound.SND_ASYNC
         if loop:
@@ -937,7 +1336,7 @@ class GeminiDialog(wx.Dialog):
 
     def add_videos(self, paths: list[str]):
         """Add videos from external source (e.g., screen recording)."""
-        self._pending_videos.extend(paths)
+        self._pending_videos.extend(map(_video_entry, paths))
         self._update_attachment_label()
         if not self.IsShown():
             self.Show()
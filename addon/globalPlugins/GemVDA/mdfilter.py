@@ -9,6 +9,100 @@ Removes common markdown formatting that AI models produce.
 import re
 
 
+# Matches if any of the filter's patterns could apply: a markdown character,
+# a possible ordered list marker, or a run of blank lines. Most streamed
+# text has none of these and skips the patterns entirely.
+_MARKUP_HINT = re.compile(r'[*_`#~>\[!+-]|\d\.|\n{3}')
+
+# Matches a line that could start with a heading, blockquote, horizontal
+# rule or list marker, so the line patterns can be skipped in one scan
+_LINE_MARKUP_HINT = re.compile(r'^[\s]*(?:[#>*_+-]|\d+\.)', re.MULTILINE)
+
+# Compiled by _build_patterns the first time text with markup is filtered
+_PATTERNS = None
+_LINE_PATTERNS = None
+_OPENERS = None
+
+# Runs of blank lines, collapsed to one
+_BLANK_LINES = re.compile(r'\n{3,}')
+
+# Whitespace other than newlines at the end or start of a line
+_LINE_EDGE_WS = re.compile(r'[^\S\n]+(?=\n|\Z)|(?<=\n)[^\S\n]+')
+
+# A line starting with plain text rather than a markup character or an
+# ordered list number
+_PLAIN_LINE_START = re.compile(r'[^\S\n]*+(?![*_`#~>\[!+-]|\d+\.)\S')
+
+
+def _build_patterns():
+    """Compile the filter's (pattern, replacement) tables on first use."""
+    # (pattern, replacement) pairs applied in order by filter_markdown. The
+    # delimited runs use possessive quantifiers: the character after a run can
+    # never be part of it, so giving characters back can't lead to a match and
+    # would only cost time on long unterminated runs.
+    patterns = [
+        # Code blocks (``` ... ```) - remove the markers but keep content
+        (re.compile(r'```[\w]*\n?(.*?)```', re.DOTALL), r'\1'),
+        # Inline code (`code`) - remove backticks
+        (re.compile(r'`([^`]++)`'), r'\1'),
+        # Images ![alt](url) -> alt
+        (re.compile(r'!\[([^\]]*+)\]\([^)]++\)'), r'\1'),
+        # Links [text](url) -> text
+        (re.compile(r'\[([^\]]++)\]\([^)]++\)'), r'\1'),
+        # Reference links [text][ref] -> text
+        (re.compile(r'\[([^\]]++)\]\[[^\]]*+\]'), r'\1'),
+        # Bold+Italic (must be before bold and italic)
+        (re.compile(r'\*\*\*([^*]++)\*\*\*'), r'\1'),
+        (re.compile(r'___([^_]++)___'), r'\1'),
+        # Bold
+        (re.compile(r'\*\*([^*]++)\*\*'), r'\1'),
+        (re.compile(r'__([^_]++)__'), r'\1'),
+        # Italic (be careful not to match underscores in words)
+        (re.compile(r'\*([^*\n]++)\*'), r'\1'),
+        (re.compile(r'(?<![a-zA-Z0-9])_([^_\n]++)_(?![a-zA-Z0-9])'), r'\1'),
+        # Strikethrough
+        (re.compile(r'~~([^~]++)~~'), r'\1'),
+    ]
+
+    # Line prefix patterns, applied in order after the ones above. They stay
+    # separate passes because each one sees the output of the one before it:
+    # "> - item" loses the quote marker first, then the bullet.
+    line_patterns = [
+        # Headings (# Heading -> Heading)
+        (re.compile(r'^#{1,6}\s+(.+)$', re.MULTILINE), r'\1'),
+        # Blockquotes (> text -> text)
+        (re.compile(r'^>\s*(.*)$', re.MULTILINE), r'\1'),
+        # Horizontal rules (---, ***, ___)
+        (re.compile(r'^[-*_]{3,}\s*$', re.MULTILINE), ''),
+        # Unordered list markers (- item, * item, + item -> item)
+        (re.compile(r'^[\s]*[-*+]\s+', re.MULTILINE), ''),
+        # Ordered list markers (1. item -> item)
+        (re.compile(r'^[\s]*\d+\.\s+', re.MULTILINE), ''),
+    ]
+
+    # For each of the patterns above, in the same order, a delimiter it left
+    # open: one with no closing character after it, so text added later could
+    # still close it. Code blocks are tracked by counting fences, and italics
+    # don't span lines.
+    bracket = re.compile(r'\[[^\]]*+(?:\](?:\([^)]*+|\[[^\]]*+))?\Z')
+    openers = [
+        None,
+        re.compile(r'`[^`]*+\Z'),
+        bracket,
+        bracket,
+        bracket,
+        re.compile(r'\*\*\*[^*]*+\Z'),
+        re.compile(r'___[^_]*+\Z'),
+        re.compile(r'\*\*[^*]*+\Z'),
+        re.compile(r'__[^_]*+\Z'),
+        None,
+        None,
+        re.compile(r'~~[^~]*+\Z'),
+    ]
+
+    return patterns, line_patterns, openers
+
+
 def filter_markdown(text: str) -> str:
     """
     Remove common markdown formatting from text.
@@ -29,57 +123,105 @@ def filter_markdown(text: str) -> str:
     """
     if not text:
         return text
+    return _filter_lines(_filter_inline(text))
 
-    # Code blocks (``` ... ```) - remove the markers but keep content
-    text = re.sub(r'```[\w]*\n?(.*?)```', r'\1', text, flags=re.DOTALL)
-
-    # Inline code (`code`) - remove backticks
-    text = re.sub(r'`([^`]+)`', r'\1', text)
-
-    # Images ![alt](url) -> alt
-    text = re.sub(r'!\[([^\]]*)\]\([^)]+\)', r'\1', text)
-
-    # Links [text](url) -> text
-    text = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', text)
-
-    # Reference links [text][ref] -> text
-    text = re.sub(r'\[([^\]]+)\]\[[^\]]*\]', r'\1', text)
-
-    # Bold+Italic (must be before bold and italic)
-    text = re.sub(r'\*\*\*([^*]+)\*\*\*', r'\1', text)
-    text = re.sub(r'___([^_]+)___', r'\1', text)
 
-    # Bold
-    text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
-    text = re.sub(r'__([^_]+)__', r'\1', text)
+def _filter_inline(text: str, closed: bool = False) -> str | None:
+    """Apply the inline patterns: code, links, emphasis and strikethrough.
 
-    # Italic (be careful not to match underscores in words)
-    text = re.sub(r'\*([^*\n]+)\*', r'\1', text)
-    text = re.sub(r'(?<![a-zA-Z0-9])_([^_\n]+)_(?![a-zA-Z0-9])', r'\1', text)
-
-    # Strikethrough
-    text = re.sub(r'~~([^~]+)~~', r'\1', text)
+    With closed set, return None instead if a pattern leaves a delimiter
+    open that text following this text could close.
+    """
+    global _PATTERNS, _LINE_PATTERNS, _OPENERS
+    if _MARKUP_HINT.search(text):
+        if _PATTERNS is None:
+            _PATTERNS, _LINE_PATTERNS, _OPENERS = _build_patterns()
+        for (pattern, repl), opener in zip(_PATTERNS, _OPENERS):
+            text = pattern.sub(repl, text)
+            if closed and opener is not None and opener.search(text):
+                return None
+    return text
+
+
+def _filter_lines(text: str) -> str:
+    """Apply the line patterns to inline-filtered text and clean up whitespace."""
+    # Text with a line marker also has a markup hint, so the inline pass
+    # has already compiled the patterns
+    if _LINE_MARKUP_HINT.search(text):
+        for pattern, repl in _LINE_PATTERNS:
+            text = pattern.sub(repl, text)
+
+    # A single line, as most streamed pieces are, has no blank lines to
+    # collapse and no inner line edges; the final strip does the rest
+    if '\n' in text:
+        # Clean up extra blank lines
+        text = _BLANK_LINES.sub('\n\n', text)
+        # Clean up leading/trailing whitespace on lines; the first line's
+        # leading whitespace goes with the final strip
+        text = _LINE_EDGE_WS.sub('', text)
 
-    # Headings (# Heading -> Heading)
-    text = re.sub(r'^#{1,6}\s+(.+)$', r'\1', text, flags=re.MULTILINE)
+    return text.strip()
 
-    # Blockquotes (> text -> text)
-    text = re.sub(r'^>\s*(.*)$', r'\1', text, flags=re.MULTILINE)
 
-    # Horizontal rules (---, ***, ___)
-    text = re.sub(r'^[-*_]{3,}\s*$', '', text, flags=re.MULTILINE)
+def _join(before: str, after: str) -> str:
+    """Join filtered text from either side of a paragraph break."""
+    if before and after:
+        return f'{before}\n\n{after}'
+    return before or after
 
-    # Unordered list markers (- item, * item, + item -> item)
-    text = re.sub(r'^[\s]*[-*+]\s+', '', text, flags=re.MULTILINE)
 
-    # Ordered list markers (1. item -> item)
-    text = re.sub(r'^[\s]*\d+\.\s+', '', text, flags=re.MULTILINE)
+def _can_split_at(text: str, boundary: int) -> bool:
+    """Check that the line after a paragraph break allows splitting there.
 
-    # Clean up extra blank lines
-    text = re.sub(r'\n{3,}', '\n\n', text)
+    The line must be complete and start with plain text: markup there could
+    still change with the text that follows, and the list patterns also
+    swallow the blank line before a list item.
+    """
+    line_end = text.find('\n', boundary + 2)
+    return line_end != -1 and bool(_PLAIN_LINE_START.match(text, boundary + 2, line_end))
 
-    # Clean up leading/trailing whitespace on lines
-    lines = [line.strip() for line in text.split('\n')]
-    text = '\n'.join(lines)
 
-    return text.strip()
+def filter_markdown_stream(text: str, state: tuple | None = None) -> tuple[str, tuple]:
+    """
+    Filter text that grows over time, such as a streamed response.
+
+    Text up to the last paragraph break outside any code fence is filtered
+    once and kept; only the rest is filtered again on the next call, so a
+    response isn't re-filtered from the start for every chunk. A break is
+    only used once no markup spans it and filtering either side of it gives
+    the same text as filtering both together, so the result is the same as
+    filter_markdown(text).
+
+    Args:
+        text: The full text so far
+        state: State returned by the previous call for an earlier form of
+            the same text, or None to start over
+
+    Returns:
+        The filtered text and the state to pass with the next call
+    """
+    committed_upto, committed_fences, filtered_committed = state or (0, 0, '')
+    pending = filter_markdown(text[committed_upto:])
+
+    # Commit up to the last paragraph break that isn't inside a code fence
+    boundary = text.rfind('\n\n', committed_upto)
+    while boundary != -1:
+        fences = committed_fences + text.count('```', committed_upto, boundary)
+        if fences % 2 == 0 and _can_split_at(text, boundary):
+            # Markup still open before the break could be closed after it;
+            # then wait for more text rather than filtering again for
+            # earlier breaks
+            before = _filter_inline(text[committed_upto:boundary], closed=True)
+            if before is not None:
+                segment = _filter_lines(before)
+                after = filter_markdown(text[boundary:])
+                if _join(segment, after) == pending:
+                    filtered_committed = _join(filtered_committed, segment)
+                    committed_upto = boundary
+                    committed_fences = fences
+                    pending = after
+            break
+        boundary = text.rfind('\n\n', committed_upto, boundary)
+
+    filtered = _join(filtered_committed, pending)
+    return filtered, (committed_upto, committed_fences, filtered_committed)
@@ -9,6 +9,7 @@ import os
 import sys
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from logHandler import log
 
@@ -34,23 +35,26 @@ except Exception as e:
     log.error(f"mss import error: {e}", exc_info=True)
 
 try:
-    import imageio.v3 as iio
+    import imageio_ffmpeg
     IMAGEIO_AVAILABLE = True
-    log.info("imageio.v3 loaded successfully")
-except ImportError:
-    try:
-        import imageio as iio
-        IMAGEIO_AVAILABLE = True
-        log.info("imageio loaded successfully")
-    except ImportError as e:
-        IMAGEIO_AVAILABLE = False
-        log.warning(f"imageio not available for video encoding: {e}")
-    except Exception as e:
-        IMAGEIO_AVAILABLE = False
-        log.error(f"imageio import error: {e}", exc_info=True)
+    log.info("imageio-ffmpeg loaded successfully")
+except ImportError as e:
+    IMAGEIO_AVAILABLE = False
+    log.warning(f"imageio-ffmpeg not available for video encoding: {e}")
 except Exception as e:
     IMAGEIO_AVAILABLE = False
-    log.error(f"imageio.v3 import error: {e}", exc_info=True)
+    log.error(f"imageio-ffmpeg import error: {e}", exc_info=True)
+
+try:
+    from PIL import Image
+    import numpy as np
+    PIL_AVAILABLE = True
+except ImportError as e:
+    PIL_AVAILABLE = False
+    log.warning(f"PIL/numpy not available for video capture: {e}")
+except Exception as e:
+    PIL_AVAILABLE = False
+    log.error(f"PIL/numpy import error: {e}", exc_info=True)
 
 
 class VideoCapture:
@@ -72,8 +76,11 @@ class VideoCapture:
         self.scale = scale
 
         self._recording = False
-        self._thread = None
-        self._frames = []
+        self._executor = None  # Capture worker, kept across recordings
+        self._future = None
+        self._local = threading.local()
+        self._frame_count = 0  # Frames sent to the encoder
+        self._error = None  # Set if encoding failed
         self._start_time = None
         self._output_path = None
 
@@ -85,7 +92,7 @@ class VideoCapture:
     @property
     def is_available(self) -> bool:
         """Check if video capture is available."""
-        return MSS_AVAILABLE and IMAGEIO_AVAILABLE
+        return MSS_AVAILABLE and IMAGEIO_AVAILABLE and PIL_AVAILABLE
 
     def start(self) -> bool:
         """
@@ -110,20 +117,24 @@ class VideoCapture:
         self._output_path = os.path.join(self.output_dir, f"capture_{timestamp}.mp4")
 
         # Reset state
-        self._frames = []
-        self._start_time = time.time()
+        self._frame_count = 0
+        self._error = None
+        self._start_time = time.perf_counter()
         self._recording = True
 
-        # Start capture thread
-        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
-        self._thread.start()
+        # Start capture on the worker
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="GemVDAVideoCapture"
+            )
+        self._future = self._executor.submit(self._capture_loop)
 
         log.info(f"Started video recording to {self._output_path}")
         return True
 
     def stop(self) -> str | None:
         """
-        Stop recording and save video.
+        Stop recording and finish the video file.
 
         Returns:
             Path to saved video file, or None if failed
@@ -134,146 +145,168 @@ class VideoCapture:
 
         self._recording = False
 
-        # Wait for capture thread to finish
-        if self._thread and self._thread.is_alive():
-            self._thread.join(timeout=5.0)
-
-        # Save video
-        if self._frames:
+        # Wait for capture loop to finish; it closes the encoder on its way out
+        if self._future is not None:
             try:
-                return self._save_video()
-            except Exception as e:
-                log.error(f"Failed to save video: {e}", exc_info=True)
+                self._future.result(timeout=10.0)
+            except TimeoutError:
+                log.error("Capture loop did not finish, video not saved")
                 return None
-        else:
+
+        if self._error is not None:
+            log.error(f"Failed to save video: {self._error}")
+            return None
+        if not self._frame_count:
             log.warning("No frames captured")
             return None
 
-    def _capture_loop(self):
-        """Main capture loop - runs in background thread."""
-        frame_interval = 1.0 / self.fps
-
-        try:
-            # Import PIL for resizing
-            from PIL import Image
-            import numpy as np
-
-            with mss.mss() as sct:
-                # Capture primary monitor
-                monitor = sct.monitors[1]  # Primary monitor
-
-                # Pre-calculate target size
-                target_width = int(monitor["width"] * self.scale)
-                target_height = int(monitor["height"] * self.scale)
-
-                while self._recording:
-                    loop_start = time.time()
-
-                    # Check max duration
-                    elapsed = time.time() - self._start_time
-                    if elapsed >= self.max_duration:
-                        log.info(f"Max recording duration reached ({self.max_duration}s)")
-                        self._recording = False
-                        break
-
-                    # Capture frame
-                    try:
-                        img = sct.grab(monitor)
-
-                        # Convert to PIL Image for resizing
-                        pil_img = Image.frombytes("RGB", img.size, img.bgra, "raw", "BGRX")
+        log.info(f"Video saved to {self._output_path} ({self._frame_count} frames)")
+        return self._output_path
 
-                        # Resize to reduce file size
-                        if self.scale < 1.0:
-                            pil_img = pil_img.resize(
-                                (target_width, target_height),
-                                Image.Resampling.BILINEAR  # Fast resize for video
-                            )
-
-                        # Convert to numpy array
-                        frame = np.array(pil_img)
-                        self._frames.append(frame)
-                    except Exception as e:
-                        log.error(f"Frame capture error: {e}")
-
-                    # Maintain frame rate
-                    elapsed_frame = time.time() - loop_start
-                    sleep_time = frame_interval - elapsed_frame
-                    if sleep_time > 0:
-                        time.sleep(sleep_time)
+    def close(self):
+        """Stop recording and release the capture worker and its mss instance."""
+        if self._recording:
+            self.stop()
+        if self._executor is not None:
+            self._executor.submit(self._close_mss)
+            self._executor.shutdown(wait=False)
+            self._executor = None
 
-        except Exception as e:
-            log.error(f"Capture loop error: {e}", exc_info=True)
-            self._recording = False
+    def _get_mss(self):
+        """Get the mss instance for the current thread, creating it on first use.
 
-    def _save_video(self) -> str:
-        """Save captured frames to video file."""
-        if not self._frames:
-            raise ValueError("No frames to save")
+        mss keeps its GDI handles per thread, so the instance lives on the
+        capture worker and is reused by every recording.
+        """
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = self._local.sct = mss.mss()
+        return sct
+
+    def _close_mss(self):
+        """Release the current thread's mss instance, if any."""
+        sct = getattr(self._local, "sct", None)
+        if sct is not None:
+            self._local.sct = None
+            sct.close()
 
-        log.info(f"Saving {len(self._frames)} frames to video...")
+    def _capture_loop(self):
+        """Main capture loop - runs in background thread.
 
-        # Try different methods to save video
-        saved = False
-        last_error = None
+        Frames are piped to ffmpeg as they are captured, so memory use
+        doesn't grow with the recording and encoding overlaps the capture.
+        """
+        frame_interval = 1.0 / self.fps
+        writer = None
 
-        # Method 1: Use imageio-ffmpeg directly with writer
         try:
-            import imageio_ffmpeg
-            ffmpeg_path = imageio_ffmpeg.get_ffmpeg_exe()
-            log.info(f"Using ffmpeg from: {ffmpeg_path}")
-
-            # Get frame dimensions from first frame
-            height, width = self._frames[0].shape[:2]
-
-            # Write using imageio-ffmpeg writer
+            sct = self._get_mss()
+            # Capture primary monitor
+            monitor = sct.monitors[1]  # Primary monitor
+
+            # Pre-calculate target size
+            scale = min(self.scale, 1.0)
+            target_width = int(monitor["width"] * scale)
+            target_height = int(monitor["height"] * scale)
+
+            # Scales of 1/n are done by taking every n-th pixel of the raw
+            # capture, which needs no intermediate image
+            step = round(1 / scale) if scale > 0 else 0
+            strided = step >= 1 and abs(step * scale - 1.0) < 1e-9
+            # At full size the raw BGRA capture goes to ffmpeg untouched
+            native = strided and step == 1
+            if strided and not native:
+                # The writer passes any buffer straight to ffmpeg's stdin and
+                # the write completes before send() returns, so one frame
+                # buffer is reused for the whole recording
+                frame_buf = np.empty((target_height, target_width, 3), dtype=np.uint8)
+
+            # Start the encoder
+            log.info(f"Using ffmpeg from: {imageio_ffmpeg.get_ffmpeg_exe()}")
             writer = imageio_ffmpeg.write_frames(
                 self._output_path,
-                (width, height),
+                (target_width, target_height),
                 fps=self.fps,
                 codec="libx264",
-                pix_fmt_in="rgb24",
+                pix_fmt_in="bgra" if native else "rgb24",
                 pix_fmt_out="yuv420p",
             )
             writer.send(None)  # Initialize
 
-            for frame in self._frames:
-                writer.send(frame.tobytes())
+            prev_raw = None  # Raw capture the current data was made from
+            next_frame = time.perf_counter()
+            while self._recording:
+                # Check max duration
+                elapsed = time.perf_counter() - self._start_time
+                if elapsed >= self.max_duration:
+                    log.info(f"Max recording duration reached ({self.max_duration}s)")
+                    self._recording = False
+                    break
+
+                # Capture frame
+                try:
+                    img = sct.grab(monitor)
+
+                    if native:
+                        data = img.raw
+                    elif img.raw == prev_raw:
+                        # Screen unchanged since the last frame; send the
+                        # already converted data again
+                        pass
+                    elif strided:
+                        # View of the BGRA bytes, every step-th pixel with the
+                        # channels reversed to RGB, copied into the frame buffer
+                        bgra = np.frombuffer(img.raw, dtype=np.uint8).reshape(
+                            img.height, img.width, 4
+                        )
+                        np.copyto(
+                            frame_buf,
+                            bgra[:target_height * step:step, :target_width * step:step, 2::-1],
+                        )
+                        data = frame_buf
+                    else:
+                        # Convert to PIL Image for resizing
+                        pil_img = Image.frombytes("RGB", img.size, img.bgra, "raw", "BGRX")
+                        pil_img = pil_img.resize(
+                            (target_width, target_height),
+                            Image.Resampling.NEAREST  # Fastest resize; fine for screen content
+                        )
+                        data = pil_img.tobytes()
+                    prev_raw = img.raw
+                except Exception as e:
+                    log.error(f"Frame capture error: {e}")
+                else:
+                    writer.send(data)
+                    self._frame_count += 1
+
+                # Maintain frame rate against absolute deadlines, so
+                # sleep overshoot doesn't accumulate into drift
+                next_frame += frame_interval
+                sleep_time = next_frame - time.perf_counter()
+                if sleep_time > 0:
+                    time.sleep(sleep_time)
+                elif sleep_time < -frame_interval:
+                    # More than a frame behind; resync instead of bursting
+                    next_frame = time.perf_counter()
 
-            writer.close()
-            saved = True
-            log.info("Video saved using imageio-ffmpeg writer")
         except Exception as e:
-            last_error = e
-            log.warning(f"imageio-ffmpeg writer failed: {e}")
-
-        # Method 2: Try imageio with auto-detection
-        if not saved:
-            try:
-                iio.imwrite(
-                    self._output_path,
-                    self._frames,
-                    fps=self.fps,
-                )
-                saved = True
-                log.info("Video saved using imageio auto-detection")
-            except Exception as e:
-                last_error = e
-                log.warning(f"imageio auto-detection failed: {e}")
-
-        if not saved:
-            raise RuntimeError(f"Failed to save video: {last_error}")
-
-        # Clear frames to free memory
-        self._frames = []
-
-        log.info(f"Video saved to {self._output_path}")
-        return self._output_path
+            log.error(f"Capture loop error: {e}", exc_info=True)
+            self._error = e
+            self._recording = False
+            # Start from a fresh mss instance next time
+            self._close_mss()
+        finally:
+            if writer is not None:
+                try:
+                    writer.close()
+                except Exception as e:
+                    log.error(f"Failed to finish video: {e}", exc_info=True)
+                    self._error = e
 
     def get_duration(self) -> float:
         """Get current recording duration in seconds."""
         if self._start_time and self._recording:
-            return time.time() - self._start_time
+            return time.perf_counter() - self._start_time
         return 0.0
 
 
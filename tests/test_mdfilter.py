@@ -0,0 +1,77 @@
+# Gemini NVDA Add-on - Markdown Filter Tests
+# -*- coding: utf-8 -*-
+
+"""
+Checks that filtering streamed text incrementally gives the same result as
+filtering the whole text at once.
+"""
+
+import os
+import random
+import sys
+import unittest
+
+# mdfilter has no NVDA dependencies, so it is imported directly rather than
+# through the add-on package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "addon", "globalPlugins", "GemVDA"))
+
+from mdfilter import filter_markdown, filter_markdown_stream  # noqa: E402
+
+
+CORPUS = [
+    "Use the `x\n\nvalue. Then call `foo()` here.",
+    "Some **bold that\n\ncontinues** over a break.\n\nAnd more text.",
+    "An __underlined\n\nrun__ and ~~struck\n\nthrough~~ text.\n\nDone.",
+    "A [link that\n\nwraps](http://example.com) and ![an image](\n\nhttp://x) here.\n\nEnd.",
+    "Reference [text][\n\nref] in a paragraph.\n\nMore text.",
+    "___\n\n__x\n\nThen __closing__ later.\n\nFinal.",
+    "__x___\n\n?\n___",
+    "***\n\nSome **bold** after a rule.\n\nMore.",
+    "# Title\n\nIntro with *italic* text.\n\n- one\n- two\n\n1. first\n2. second\n\nOutro.",
+    "Before\n\n```python\nx = 1\n\n\ny = 2\n```\n\nAfter the `code` block.\n\nDone.",
+    "> Quote with **bold**\n\nText after the quote.\n\n---\n\nText after the rule.",
+    "#\n\nHeading marker alone\n\n-\n\nList marker alone\n\nEnd.",
+    "Trailing spaces   \n \n\nNext paragraph\n\n\n\nAfter blank lines.",
+]
+
+# Pieces for random text, weighted towards markup and paragraph breaks
+TOKENS = [
+    "Hello", " ", "world", "**", "*", "_", "__", "___", "***", "`", "```", "```py\n",
+    "#", "## ", "> ", "-", "- ", "+ ", "1. ", "~~", "[", "]", "(", ")", "![",
+    "](http://x)", "\n", "\n\n", "\n\n", "\n\n\n", "  ", "---", "a_b", "x", ".", "?",
+]
+
+
+def _stream(text: str, rng: random.Random) -> str:
+    """Filter text the way a streamed response is, in random-sized chunks."""
+    state = None
+    filtered = ""
+    end = 0
+    while end < len(text):
+        end = min(len(text), end + rng.randint(1, 12))
+        filtered, state = filter_markdown_stream(text[:end], state)
+    return filtered
+
+
+class FilterMarkdownStreamTest(unittest.TestCase):
+    def test_corpus(self):
+        for text in CORPUS:
+            for seed in range(20):
+                with self.subTest(text=text, seed=seed):
+                    self.assertEqual(_stream(text, random.Random(seed)), filter_markdown(text))
+
+    def test_random(self):
+        for seed in range(2000):
+            rng = random.Random(seed)
+            text = "".join(rng.choice(TOKENS) for _ in range(rng.randint(1, 60)))
+            with self.subTest(text=text):
+                self.assertEqual(_stream(text, rng), filter_markdown(text))
+
+    def test_commits_plain_paragraphs(self):
+        text = "First paragraph.\n\nSecond **bold** one.\n\nThird.\n"
+        _filtered, state = filter_markdown_stream(text)
+        self.assertEqual(state[0], text.rindex("\n\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()